@@ -218,6 +218,25 @@ def get_places_by_state(state: str) -> List[Dict[str, Any]]:
     
     return results
 
+def get_places_by_states(states: List[str]) -> List[Dict[str, Any]]:
+    """
+    Get haunted places for several states in a single pass
+    
+    Args:
+        states: State names
+        
+    Returns:
+        List of haunted places in any of the states
+    """
+    wanted = {state.lower() for state in states}
+    results = []
+    
+    for place in data_store.get_documents('haunted_places'):
+        if (place.get('state') or '').lower() in wanted:
+            results.append(place)
+    
+    return results
+
 def get_places_by_country(country: str) -> List[Dict[str, Any]]:
     """
     Get haunted places for a specific country
@@ -1,13 +1,357 @@
 import streamlit as st
+import streamlit.components.v1 as components
 import os
+import io
+import re
 import json
+import threading
+import functools
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
+import plotly.io as pio
 from pathlib import Path
-import folium
-from streamlit_folium import folium_static
-from folium.plugins import MarkerCluster
+from types import MappingProxyType
+from PIL import Image
+import requests
+from data_storage import data_store, get_places_by_states
+
+# Serialize figures with orjson when it is installed
+try:
+    import orjson
+    pio.json.config.default_engine = "orjson"
+except ImportError:
+    orjson = None
+
+# Cluster dominant colors with K-means when scikit-learn is installed
+try:
+    from sklearn.cluster import MiniBatchKMeans
+except ImportError:
+    MiniBatchKMeans = None
+
+# Tab bodies are rendered as fragments so a widget interaction only reruns
+# the tab it belongs to (st.fragment from Streamlit 1.37, experimental
+# before that); older versions fall back to rerunning the whole script
+fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda func: func)
+
+# Fixed display width for ImageSpace previews, so the browser never rescales
+# a full-resolution image to the column width
+IMAGE_WIDTH = 480
+
+# Tab labels of the D3 visualizations and MEMEX tools pages
+D3_TAB_LABELS = (
+    "🗺️ Map Visualization",
+    "⏱️ Time Analysis",
+    "🔍 Evidence Analysis",
+    "📍 Location Analysis",
+    "📊 Correlation Analysis",
+)
+MEMEX_TAB_LABELS = ("ImageSpace", "GeoParser")
+
+# Label column and accepted alternative column names for each counts payload
+COUNT_FRAMES = {
+    "time": {
+        "year_counts": ("year", ("name",)),
+        "month_counts": ("month", ("name",)),
+        "time_of_day_counts": ("time_of_day", ("name",)),
+    },
+    "evidence": {
+        "evidence_counts": ("type", ("name",)),
+        "apparition_counts": ("type", ("apparition_type", "name")),
+    },
+    "location": {
+        "state_counts": ("state", ("name",)),
+        "country_counts": ("country", ("name",)),
+        "city_counts": ("city", ("name",)),
+    },
+}
+
+# Processed analysis files loaded for the visualization tabs
+DATA_FILES = {
+    "air_pollution": "air_pollution.json",
+    "map": "map_data.json",
+    "time": "time_analysis.json",
+    "evidence": "evidence_analysis.json",
+    "location": "location_analysis.json",
+    "correlation": "correlation_data.json",
+}
+
+def _plot(fig, key=None):
+    """
+    Display a Plotly figure at container width
+    The figures are built from the static processed data, so a stable key and
+    uirevision let reruns update the existing plot instead of redrawing it
+    """
+    if fig.layout.uirevision is None:
+        fig.update_layout(uirevision="static")
+    st.plotly_chart(fig, use_container_width=True, config={"responsive": True}, key=key)
+
+def _bar(df, y, x, title, yaxis_title, xaxis_title):
+    """
+    Horizontal bar chart colored by value on the Viridis scale
+    Shared by the evidence, apparition, state, density and city breakdowns
+    """
+    fig = px.bar(
+        df,
+        y=y,
+        x=x,
+        title=title,
+        color=x,
+        color_continuous_scale="Viridis",
+        orientation="h"
+    )
+    fig.update_layout(yaxis_title=yaxis_title, xaxis_title=xaxis_title, uirevision=title)
+    return fig
+
+# Qualitative palettes resolved once instead of per chart
+SET2 = list(px.colors.qualitative.Set2)
+SET3 = list(px.colors.qualitative.Set3)
+
+# Static orderings and color maps for the time analysis charts
+MONTH_ORDER = (
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December"
+)
+SEASON_MAP = MappingProxyType({
+    "December": "Winter", "January": "Winter", "February": "Winter",
+    "March": "Spring", "April": "Spring", "May": "Spring",
+    "June": "Summer", "July": "Summer", "August": "Summer",
+    "September": "Fall", "October": "Fall", "November": "Fall"
+})
+SEASON_ORDER = ("Winter", "Spring", "Summer", "Fall")
+SEASON_COLORS = MappingProxyType({
+    "Winter": "#9ecae1", 
+    "Spring": "#a1d99b",
+    "Summer": "#fd8d3c",
+    "Fall": "#de2d26"
+})
+TIME_ORDER = ("Morning", "Afternoon", "Evening", "Night", "Midnight")
+TIME_COLORS = MappingProxyType({
+    "Morning": "#ffeda0",   # Light yellow
+    "Afternoon": "#feb24c",  # Orange
+    "Evening": "#f03b20",    # Dark orange/red
+    "Night": "#2c7fb8",     # Dark blue
+    "Midnight": "#253494"   # Very dark blue
+})
+
+# Known month and time-of-day labels for vectorized membership checks
+MONTH_SET = frozenset(MONTH_ORDER)
+TIME_SET = frozenset(TIME_ORDER)
+
+# Rows sent to the browser for the searchable state/city tables
+TABLE_ROWS = 200
+
+# Largest image download accepted by the ImageSpace URL option
+MAX_IMAGE_BYTES = 10_000_000
+
+# Above this many GeoParser hits markers are clustered client-side without popups
+MAX_FULL_MARKERS = 200
+
+# US state codes used to detect US-centric state counts
+US_STATES = frozenset([
+    'AL', 'AK', 'AZ', 'AR', 'CA', 'CO', 'CT', 'DE', 'FL', 'GA',
+    'HI', 'ID', 'IL', 'IN', 'IA', 'KS', 'KY', 'LA', 'ME', 'MD',
+    'MA', 'MI', 'MN', 'MS', 'MO', 'MT', 'NE', 'NV', 'NH', 'NJ',
+    'NM', 'NY', 'NC', 'ND', 'OH', 'OK', 'OR', 'PA', 'RI', 'SC',
+    'SD', 'TN', 'TX', 'UT', 'VT', 'VA', 'WA', 'WV', 'WI', 'WY'
+])
+
+# Approximate state populations in millions (for demonstration)
+STATE_POP = pd.Series({
+    "california": 39.5, "texas": 29.0, "florida": 21.5, "new york": 19.5, 
+    "pennsylvania": 12.8, "illinois": 12.7, "ohio": 11.7, "georgia": 10.6,
+    "north carolina": 10.4, "michigan": 10.0, "new jersey": 9.0, 
+    "virginia": 8.5, "washington": 7.6, "arizona": 7.2, "massachusetts": 7.0,
+    "tennessee": 6.9, "indiana": 6.7, "missouri": 6.1, "maryland": 6.0,
+    "wisconsin": 5.8, "colorado": 5.7, "minnesota": 5.6, "south carolina": 5.1,
+    "alabama": 5.0, "louisiana": 4.6, "kentucky": 4.5, "oregon": 4.2,
+    "oklahoma": 4.0, "connecticut": 3.6, "utah": 3.2, "iowa": 3.2,
+    "nevada": 3.1, "arkansas": 3.0, "mississippi": 3.0, "kansas": 2.9,
+    "new mexico": 2.1, "nebraska": 1.9, "west virginia": 1.8, "idaho": 1.8,
+    "hawaii": 1.4, "new hampshire": 1.4, "maine": 1.3, "montana": 1.1,
+    "rhode island": 1.1, "delaware": 1.0, "south dakota": 0.9, 
+    "north dakota": 0.8, "alaska": 0.7, "vermont": 0.6, "wyoming": 0.6,
+    "washington dc": 0.7
+}, name="population_millions")
+STATE_POP.index = STATE_POP.index.astype("string[pyarrow]")
+
+def _counts_frame(raw, label, aliases=("name",)):
+    """
+    Convert a counts payload (list of records or dict) into a DataFrame
+    with `label` and `count` columns
+    """
+    if isinstance(raw, list):
+        # If it's a list of dictionaries
+        df = pd.DataFrame(raw)
+        if label not in df.columns:
+            for alias in aliases:
+                if alias in df.columns:
+                    df = df.rename(columns={alias: label})
+                    break
+        if "count" not in df.columns and "value" in df.columns:
+            df = df.rename(columns={"value": "count"})
+    else:
+        # If it's a dictionary
+        df = pd.DataFrame({
+            label: list(raw.keys()),
+            "count": list(raw.values())
+        })
+    return df
+
+def _nested_records(raw, outer, inner, value="count"):
+    """
+    Convert a nested {outer: {inner: value}} payload into a DataFrame of records
+    Lists of records are used as they are
+    """
+    if isinstance(raw, dict):
+        return pd.DataFrame([
+            {outer: outer_key, inner: inner_key, value: inner_value}
+            for outer_key, inner_values in raw.items()
+            for inner_key, inner_value in inner_values.items()
+        ])
+    return pd.DataFrame(raw)
+
+@st.cache_data
+def load_visualization_data(output_dir="output"):
+    """
+    Load the processed analysis data for the visualization tabs
+    The map records are converted once into a DataFrame with Arrow-backed
+    string columns so the country/state filters and groupbys use Arrow kernels,
+    and every counts payload is normalized into a DataFrame under data["frames"]
+    """
+    data = {}
+    for key, file_name in DATA_FILES.items():
+        try:
+            with open(os.path.join(output_dir, file_name), "r") as f:
+                data[key] = json.load(f)
+        except Exception as e:
+            data[key] = None
+    
+    data["map_df"] = None
+    if data["map"] and "map_data" in data["map"]:
+        map_df = pd.DataFrame(data["map"]["map_data"])
+        string_columns = map_df.select_dtypes(include="object").columns
+        map_df[string_columns] = map_df[string_columns].astype("string[pyarrow]")
+        data["map_df"] = map_df
+    
+    # Normalize every counts payload once into a DataFrame with label and count columns.
+    # A malformed payload is skipped and its error kept, so only its own tab
+    # section reports the error
+    frames = {}
+    frame_errors = {}
+    for section, payloads in COUNT_FRAMES.items():
+        for key, (label, aliases) in payloads.items():
+            if data[section] and key in data[section]:
+                try:
+                    frame = _counts_frame(data[section][key], label, aliases)
+                    if section != "time":
+                        frame = frame.sort_values("count", ascending=False)
+                    frames[key] = frame
+                except Exception as e:
+                    frame_errors[key] = e
+    
+    if "state_counts" in frames:
+        # Normalize state names once on an Arrow-backed string column:
+        # uppercase for code comparison, lowercase for population lookups
+        try:
+            state_df = frames["state_counts"]
+            states = state_df["state"].astype("string[pyarrow]")
+            state_df["state_upper"] = states.str.upper()
+            state_df["state_lower"] = states.str.lower()
+        except Exception as e:
+            del frames["state_counts"]
+            frame_errors["state_counts"] = e
+    
+    nested = (
+        ("time", "year_month_counts", "year", "month"),
+        ("evidence", "correlations", "evidence_type", "apparition_type"),
+    )
+    for section, key, outer, inner in nested:
+        if data[section] and key in data[section]:
+            try:
+                frames[key] = _nested_records(data[section][key], outer, inner)
+            except Exception as e:
+                frame_errors[key] = e
+    
+    data["frames"] = frames
+    data["frame_errors"] = frame_errors
+    return data
+
+def _frame(data, key):
+    """Normalized DataFrame for a payload, re-raising the error that kept it from loading"""
+    if key in data["frame_errors"]:
+        raise data["frame_errors"][key]
+    return data["frames"][key]
+
+@st.cache_data(ttl="1h", max_entries=32)
+def _build_correlation_pivot(corr_df):
+    """Evidence/apparition heatmap pivot, or None if the format is unexpected"""
+    if corr_df.empty or not {"evidence_type", "apparition_type", "count"}.issubset(corr_df.columns):
+        return None
+    
+    # Pairs are unique, so a plain unstack avoids the aggregating pivot_table path
+    return (
+        corr_df.set_index(["evidence_type", "apparition_type"])["count"]
+        .unstack(fill_value=0)
+    )
+
+@st.cache_data(ttl="1h", max_entries=32)
+def _build_density_df(state_df):
+    """Top 15 states by hauntings per million residents"""
+    # Add population data and calculate haunting density
+    state_df = state_df.join(STATE_POP, on="state_lower")
+    state_df["hauntings_per_million"] = state_df["count"] / state_df["population_millions"]
+    
+    # Filter out states with missing population data
+    state_df = state_df.dropna(subset=["population_millions"])
+    
+    # Sort by haunting density
+    return state_df.sort_values("hauntings_per_million", ascending=False).head(15)
+
+@st.cache_data(ttl="1h", max_entries=64)
+def _filter_table(df, column, query, limit=TABLE_ROWS):
+    """First `limit` rows whose `column` contains `query` (case-insensitive)"""
+    if query:
+        df = df[df[column].str.contains(query, case=False, na=False, regex=False)]
+    return df.loc[:, [column, "count"]].head(limit)
+
+@st.cache_data(ttl="1h", max_entries=32)
+def _build_correlation_matrix(correlation_data, limit=6):
+    """Square correlation matrix over the first `limit` variables"""
+    records = pd.DataFrame(correlation_data)
+    
+    # Get unique variables - limit to just a few for visibility
+    variables = sorted(records["x"].unique())[:limit]
+    records = records[records["x"].isin(variables) & records["y"].isin(variables)]
+    
+    # Scatter the values into a zero matrix indexed by categorical codes
+    xs = pd.Categorical(records["x"], categories=variables).codes
+    ys = pd.Categorical(records["y"], categories=variables).codes
+    matrix = np.zeros((len(variables), len(variables)))
+    matrix[xs, ys] = records["value"].to_numpy()
+    
+    return pd.DataFrame(matrix, index=variables, columns=variables)
+
+def _json_text(value):
+    """Pretty-printed JSON text, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_INDENT_2).decode()
+    return json.dumps(value, indent=2)
+
+def _render_raw_data(section, keys, name):
+    """
+    Raw analysis payloads shown as plain JSON text inside an expander
+    The expander body always runs, so the JSON is only serialized once the
+    checkbox is ticked
+    """
+    if not st.checkbox("Show raw JSON", key=f"raw_{name}"):
+        return
+    
+    for key in keys:
+        if key in section:
+            st.subheader(f"Raw {key.replace('_', ' ').title()} Data")
+            st.code(_json_text(section[key]), language="json")
 
 def add_d3_visualizations_tab():
     """
@@ -29,53 +373,12 @@ def add_d3_visualizations_tab():
         st.rerun()
     
     # Create tabs for different visualizations with clear formatting
-    tab1, tab2, tab3, tab4, tab5 = st.tabs([
-        "🗺️ Map Visualization", 
-        "⏱️ Time Analysis", 
-        "🔍 Evidence Analysis", 
-        "📍 Location Analysis", 
-        "📊 Correlation Analysis"
-    ])
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(D3_TAB_LABELS)
     
     # Load all data
-    output_dir = "output"
-    data = {}
-    try: 
-        with open(os.path.join(output_dir, "air_pollution.json"), "r") as f:
-            data["air_pollution"] = json.load(f)
-    except Exception as e:
-        data["air_pollution"] = None
-        
-    try:
-        with open(os.path.join(output_dir, "map_data.json"), "r") as f:
-            data["map"] = json.load(f)
-    except Exception as e:
-        data["map"] = None
-        
-    try:
-        with open(os.path.join(output_dir, "time_analysis.json"), "r") as f:
-            data["time"] = json.load(f)
-    except Exception as e:
-        data["time"] = None
-        
-    try:
-        with open(os.path.join(output_dir, "evidence_analysis.json"), "r") as f:
-            data["evidence"] = json.load(f)
-    except Exception as e:
-        data["evidence"] = None
-        
-    try:
-        with open(os.path.join(output_dir, "location_analysis.json"), "r") as f:
-            data["location"] = json.load(f)
-    except Exception as e:
-        data["location"] = None
-        
-    try:
-        with open(os.path.join(output_dir, "correlation_data.json"), "r") as f:
-            data["correlation"] = json.load(f)
-    except Exception as e:
-        data["correlation"] = None
-        # Homework Insights Visualization Tab
+    data = load_visualization_data()
+    
+    # Homework Insights Visualization Tab
 
     # with tab1:
     #     st.header("Air Quality and Visual Evidence Distribution in Haunted Locations")
@@ -219,1000 +522,776 @@ def add_d3_visualizations_tab():
     
     # Map View Tab
     with tab1:
-        st.header("Map Visualization")
-        if data["map"] and "map_data" in data["map"]:
-            # Convert to DataFrame for easier processing
-            df = pd.DataFrame(data["map"]["map_data"])
-            
-            # Filter for USA data
-            usa_df = df[df['country'].str.lower() == 'united states'].copy()
-            
-            if len(usa_df) > 0:
-                # Display map using Plotly
-                fig = px.scatter_geo(
-                    usa_df, 
-                    lat="latitude", 
-                    lon="longitude",
-                    hover_name="location",
-                    hover_data=["state", "description"],
-                    title="Interactive Map of Haunted Locations in the USA",
-                    color_discrete_sequence=["red"],
-                    size_max=10,
-                )
-                
-                # Center on USA and set appropriate zoom
-                fig.update_geos(
-                    scope="usa",
-                    showcoastlines=True,
-                    coastlinecolor="Black",
-                    showland=True,
-                    landcolor="lightgray",
-                    showsubunits=True,  # This shows state boundaries
-                    subunitcolor="gray",
-                )
-                
-                fig.update_layout(
-                    height=600,
-                    margin=dict(l=0, r=0, t=30, b=0),
-                )
-                
-                st.plotly_chart(fig, use_container_width=True)
-                
-                # Add some stats about the data
-                st.markdown(f"**Total Haunted Places in USA:** {len(usa_df)}")
-                
-                # Show top 5 states
-                top_states = usa_df.groupby('state').size().reset_index(name='count').sort_values('count', ascending=False).head(5)
-                st.markdown("**Top 5 States with Most Haunted Places:**")
-                st.dataframe(top_states)
-            else:
-                st.error("No USA data found in the dataset.")
-        else:
-            st.error("Map data not available. Please run the data processing script.")
+        _render_map_tab(data)
     
     # Time Analysis Tab
     with tab2:
-        st.header("Temporal Patterns of Hauntings")
+        _render_time_tab(data)
+    
+    # Evidence Analysis Tab
+    with tab3:
+        _render_evidence_tab(data)
+    
+    # Location Analysis Tab
+    with tab4:
+        _render_location_tab(data)
+    
+    # Correlation Analysis Tab
+    with tab5:
+        _render_correlation_tab(data)
+
+@fragment
+def _render_map_tab(data):
+    """Map view tab of the D3 visualizations page"""
+    st.header("Map Visualization")
+    if data["map"] and "map_data" in data["map"]:
+        # Use the Arrow-backed frame built by the cached loader
+        df = data["map_df"]
+        
+        # Filter for USA data
+        usa_df = df[df['country'].str.lower() == 'united states'].copy()
         
-        if data["time"] and any(key in data["time"] for key in ["year_counts", "month_counts", "time_of_day_counts"]):
-            # Create three columns
-            col1, col2 = st.columns(2)
+        if len(usa_df) > 0:
+            # Display map using Plotly
+            fig = px.scatter_geo(
+                usa_df, 
+                lat="latitude", 
+                lon="longitude",
+                hover_name="location",
+                hover_data=["state", "description"],
+                title="Interactive Map of Haunted Locations in the USA",
+                color_discrete_sequence=["red"],
+                size_max=10,
+            )
             
-            # Year analysis
-            if "year_counts" in data["time"]:
-                try:
-                    with col1:
-                        st.subheader("Historical Timeline of Hauntings")
-                        
-                        # Convert to DataFrame
-                        if isinstance(data["time"]["year_counts"], list):
-                            # If it's a list of dictionaries
-                            year_df = pd.DataFrame(data["time"]["year_counts"])
-                            if "year" not in year_df.columns and "name" in year_df.columns:
-                                year_df = year_df.rename(columns={"name": "year"})
-                            if "count" not in year_df.columns and "value" in year_df.columns:
-                                year_df = year_df.rename(columns={"value": "count"})
-                        else:
-                            # If it's a dictionary
-                            year_df = pd.DataFrame({
-                                "year": list(data["time"]["year_counts"].keys()),
-                                "count": list(data["time"]["year_counts"].values())
-                            })
-                        
-                        # Convert year to numeric if it's not already
-                        year_df["year"] = pd.to_numeric(year_df["year"], errors="coerce")
-                        
-                        # Drop NaN years
-                        year_df = year_df.dropna(subset=["year"])
-                        
-                        # Filter out future years (> 2023)
-                        current_year = 2023  # Set a reasonable cutoff year
-                        year_df = year_df[year_df["year"] <= current_year]
-                        
-                        # Sort by year
-                        year_df = year_df.sort_values("year")
-                        
-                        # Create a line chart for year trends
-                        fig_line = px.line(
-                            year_df,
-                            x="year",
-                            y="count",
-                            title="Historical Trend of Reported Hauntings",
-                            markers=True
-                        )
-                        fig_line.update_layout(
-                            xaxis_title="Year",
-                            yaxis_title="Number of Reported Hauntings",
-                            hovermode="x unified",
-                            # Set default x-axis range from 1900 to current year, but allow zooming
-                            xaxis=dict(
-                                range=[1900, current_year],
-                                autorange=False
-                            )
-                        )
-                        
-                        # Add smoothed trendline
-                        if len(year_df) > 10:
-                            try:
-                                import numpy as np
-                                from scipy import stats
-                                
-                                # Add 5-year moving average
-                                year_df["moving_avg"] = year_df["count"].rolling(window=5, min_periods=1).mean()
-                                
-                                # Add moving average to plot
-                                fig_line.add_scatter(
-                                    x=year_df["year"],
-                                    y=year_df["moving_avg"],
-                                    mode="lines",
-                                    name="5-Year Moving Average",
-                                    line=dict(color="red", width=2, dash="dash")
-                                )
-                            except ImportError:
-                                pass
-                        
-                        st.plotly_chart(fig_line, use_container_width=True)
-                        
-                        # Add a note about panning to see older data
-                        st.info("💡 **Tips:** Use the 'Pan' tool in the chart toolbar to drag and see historical data before 1900. Double-click anywhere on the chart to reset the view.")
-                        
-                        # Create a histogram by decades
-                        year_df["decade"] = (year_df["year"] // 10) * 10
-                        decade_counts = year_df.groupby("decade")["count"].sum().reset_index()
-                        
-                        fig_bar = px.bar(
-                            decade_counts,
-                            x="decade",
-                            y="count",
-                            title="Hauntings by Decade",
-                            color="count",
-                            color_continuous_scale="Viridis"
-                        )
-                        fig_bar.update_layout(
-                            xaxis_title="Decade",
-                            yaxis_title="Number of Reported Hauntings",
-                            xaxis=dict(
-                                tickmode="array", 
-                                tickvals=list(decade_counts["decade"]),
-                                # Set default range from 1900 to current
-                                range=[1900, current_year],
-                                autorange=False
-                            )
-                        )
-                        
-                        st.plotly_chart(fig_bar, use_container_width=True)
-                        
-                except Exception as e:
-                    st.error(f"Error displaying year analysis: {e}")
+            # Center on USA and set appropriate zoom
+            fig.update_geos(
+                scope="usa",
+                showcoastlines=True,
+                coastlinecolor="Black",
+                showland=True,
+                landcolor="lightgray",
+                showsubunits=True,  # This shows state boundaries
+                subunitcolor="gray",
+            )
             
-            # Month and Time of Day analysis
-            if "month_counts" in data["time"] or "time_of_day_counts" in data["time"]:
-                with col2:
-                    # Month analysis
-                    if "month_counts" in data["time"]:
-                        try:
-                            st.subheader("Seasonal Patterns of Hauntings")
-                            
-                            # Convert to DataFrame
-                            if isinstance(data["time"]["month_counts"], list):
-                                # If it's a list of dictionaries
-                                month_df = pd.DataFrame(data["time"]["month_counts"])
-                                if "month" not in month_df.columns and "name" in month_df.columns:
-                                    month_df = month_df.rename(columns={"name": "month"})
-                                if "count" not in month_df.columns and "value" in month_df.columns:
-                                    month_df = month_df.rename(columns={"value": "count"})
-                            else:
-                                # If it's a dictionary
-                                month_df = pd.DataFrame({
-                                    "month": list(data["time"]["month_counts"].keys()),
-                                    "count": list(data["time"]["month_counts"].values())
-                                })
-                            
-                            # Define month order
-                            month_order = [
-                                "January", "February", "March", "April", "May", "June",
-                                "July", "August", "September", "October", "November", "December"
-                            ]
-                            
-                            # Create a category for month with proper ordering
-                            if all(month in month_order for month in month_df["month"]):
-                                month_df["month"] = pd.Categorical(month_df["month"], categories=month_order, ordered=True)
-                                month_df = month_df.sort_values("month")
-                            
-                            # Create a polar chart for months
-                            fig_polar = px.line_polar(
-                                month_df, 
-                                r="count", 
-                                theta="month",
-                                line_close=True,
-                                title="Monthly Distribution of Hauntings",
-                                color_discrete_sequence=["rgba(31, 119, 180, 0.8)"]
-                            )
-                            fig_polar.update_traces(fill='toself')
-                            
-                            st.plotly_chart(fig_polar, use_container_width=True)
-                            
-                            # Create a bar chart for months
-                            fig_bar = px.bar(
-                                month_df,
-                                x="month",
-                                y="count",
-                                title="Hauntings by Month",
-                                color="count",
-                                color_continuous_scale="Viridis"
-                            )
-                            
-                            fig_bar.update_layout(
-                                xaxis_title="Month",
-                                yaxis_title="Number of Reported Hauntings"
-                            )
-                            
-                            # Group months by season
-                            season_map = {
-                                "December": "Winter", "January": "Winter", "February": "Winter",
-                                "March": "Spring", "April": "Spring", "May": "Spring",
-                                "June": "Summer", "July": "Summer", "August": "Summer",
-                                "September": "Fall", "October": "Fall", "November": "Fall"
-                            }
-                            
-                            month_df["season"] = month_df["month"].map(season_map)
-                            season_counts = month_df.groupby("season")["count"].sum().reset_index()
-                            
-                            # Ensure proper season order
-                            season_order = ["Winter", "Spring", "Summer", "Fall"]
-                            season_counts["season"] = pd.Categorical(
-                                season_counts["season"], 
-                                categories=season_order, 
-                                ordered=True
-                            )
-                            season_counts = season_counts.sort_values("season")
-                            
-                            # Create a pie chart for seasons
-                            fig_pie = px.pie(
-                                season_counts,
-                                values="count",
-                                names="season",
-                                title="Hauntings by Season",
-                                color="season",
-                                color_discrete_map={
-                                    "Winter": "#9ecae1", 
-                                    "Spring": "#a1d99b",
-                                    "Summer": "#fd8d3c",
-                                    "Fall": "#de2d26"
-                                }
-                            )
-                            
-                            st.plotly_chart(fig_pie, use_container_width=True)
-                            
-                        except Exception as e:
-                            st.error(f"Error displaying month analysis: {e}")
+            fig.update_layout(
+                height=600,
+                margin=dict(l=0, r=0, t=30, b=0),
+            )
+            
+            _plot(fig, key="map_scatter")
+            
+            # Add some stats about the data
+            st.markdown(f"**Total Haunted Places in USA:** {len(usa_df)}")
+            
+            # Show top 5 states
+            top_states = usa_df.groupby('state').size().reset_index(name='count').sort_values('count', ascending=False).head(5)
+            st.markdown("**Top 5 States with Most Haunted Places:**")
+            st.dataframe(top_states)
+        else:
+            st.error("No USA data found in the dataset.")
+    else:
+        st.error("Map data not available. Please run the data processing script.")
+
+@fragment
+def _render_time_tab(data):
+    """Time analysis tab of the D3 visualizations page"""
+    st.header("Temporal Patterns of Hauntings")
+    
+    if data["time"] and any(key in data["time"] for key in ["year_counts", "month_counts", "time_of_day_counts"]):
+        # Create three columns
+        col1, col2 = st.columns(2)
+        
+        # Year analysis
+        if "year_counts" in data["time"]:
+            try:
+                with col1:
+                    st.subheader("Historical Timeline of Hauntings")
+                    
+                    year_df = _frame(data, "year_counts")
+                    
+                    # Convert year to numeric if it's not already
+                    year_df["year"] = pd.to_numeric(year_df["year"], errors="coerce")
                     
-                    # Time of Day analysis
-                    if "time_of_day_counts" in data["time"]:
+                    # Drop NaN years
+                    year_df = year_df.dropna(subset=["year"])
+                    
+                    # Filter out future years (> 2023)
+                    current_year = 2023  # Set a reasonable cutoff year
+                    year_df = year_df[year_df["year"] <= current_year]
+                    
+                    # Sort by year
+                    year_df = year_df.sort_values("year")
+                    
+                    # Create a line chart for year trends
+                    fig_line = px.line(
+                        year_df,
+                        x="year",
+                        y="count",
+                        title="Historical Trend of Reported Hauntings",
+                        markers=True
+                    )
+                    fig_line.update_layout(
+                        xaxis_title="Year",
+                        yaxis_title="Number of Reported Hauntings",
+                        hovermode="x unified",
+                        # Set default x-axis range from 1900 to current year, but allow zooming
+                        xaxis=dict(
+                            range=[1900, current_year],
+                            autorange=False
+                        )
+                    )
+                    
+                    # Add smoothed trendline
+                    if len(year_df) > 10:
                         try:
-                            st.subheader("Time of Day Analysis")
-                            
-                            # Convert to DataFrame
-                            if isinstance(data["time"]["time_of_day_counts"], list):
-                                # If it's a list of dictionaries
-                                time_df = pd.DataFrame(data["time"]["time_of_day_counts"])
-                                if "time_of_day" not in time_df.columns and "name" in time_df.columns:
-                                    time_df = time_df.rename(columns={"name": "time"})
-                                if "count" not in time_df.columns and "value" in time_df.columns:
-                                    time_df = time_df.rename(columns={"value": "count"})
-                            else:
-                                # If it's a dictionary
-                                time_df = pd.DataFrame({
-                                    "time_of_day": list(data["time"]["time_of_day_counts"].keys()),
-                                    "count": list(data["time"]["time_of_day_counts"].values())
-                                })
-                            
-                            # Define time of day order
-                            time_order = ["Morning", "Afternoon", "Evening", "Night", "Midnight"]
-                            
-                            # Create a category for time with proper ordering
-                            if all(time in time_order for time in time_df["time_of_day"]):
-                                time_df["time_of_day"] = pd.Categorical(time_df["time_of_day"], categories=time_order, ordered=True)
-                                time_df = time_df.sort_values("time_of_day")
-                            
-                            # Create a gauge chart for time of day
-                            # Setup color coding for time of day
-                            colors = {
-                                "Morning": "#ffeda0",   # Light yellow
-                                "Afternoon": "#feb24c",  # Orange
-                                "Evening": "#f03b20",    # Dark orange/red
-                                "Night": "#2c7fb8",     # Dark blue
-                                "Midnight": "#253494"   # Very dark blue
-                            }
-                            
-                            # Create a pie chart for time of day
-                            fig_pie = px.pie(
-                                time_df,
-                                values="count",
-                                names="time_of_day",
-                                title="Hauntings by Time of Day",
-                                color="time_of_day",
-                                color_discrete_map=colors
-                            )
-                            
-                            st.plotly_chart(fig_pie, use_container_width=True)
+                            from scipy import stats
                             
-                            # Create a half-circle gauge chart
-                            fig_gauge = go.Figure()
+                            # Add 5-year moving average
+                            year_df["moving_avg"] = year_df["count"].rolling(window=5, min_periods=1).mean()
                             
-                            # Add a curved bar for each time of day
-                            total = time_df["count"].sum()
-                            cumulative = 0
-                            
-                            for i, row in time_df.iterrows():
-                                value = row["count"] / total
-                                fig_gauge.add_trace(go.Barpolar(
-                                    r=[value],
-                                    theta=[180],  # Center the bar
-                                    width=[180],  # Cover half the circle
-                                    base=cumulative,
-                                    marker_color=colors.get(row["time_of_day"], "#000000"),
-                                    name=f"{row['time_of_day']} ({row['count']} hauntings)",
-                                    hoverinfo="name+text",
-                                    text=[f"{row['count']} hauntings ({value:.1%})"]
-                                ))
-                                cumulative += value
-                            
-                            # Update layout for the gauge
-                            fig_gauge.update_layout(
-                                title="Time of Day Distribution",
-                                polar=dict(
-                                    radialaxis=dict(visible=False, range=[0, 1]),
-                                    angularaxis=dict(
-                                        visible=True,
-                                        type="category",
-                                        tickvals=[0, 45, 90, 135, 180],
-                                        ticktext=["Dawn", "Morning", "Noon", "Evening", "Midnight"],
-                                        direction="clockwise"
-                                    )
-                                ),
-                                showlegend=True
+                            # Add moving average to plot
+                            fig_line.add_scatter(
+                                x=year_df["year"],
+                                y=year_df["moving_avg"],
+                                mode="lines",
+                                name="5-Year Moving Average",
+                                line=dict(color="red", width=2, dash="dash")
                             )
-                            
-                            st.plotly_chart(fig_gauge, use_container_width=True)
-                            
-                        except Exception as e:
-                            st.error(f"Error displaying time of day analysis: {e}")
-            
-            # Combined year and month heatmap
-            if "year_counts" in data["time"] and "month_counts" in data["time"] and "year_month_counts" in data["time"]:
-                try:
-                    st.subheader("Detailed Temporal Patterns")
+                        except ImportError:
+                            pass
                     
-                    # Convert year-month data to DataFrame
-                    if isinstance(data["time"]["year_month_counts"], list):
-                        year_month_df = pd.DataFrame(data["time"]["year_month_counts"])
-                    else:
-                        # Convert nested dictionary to DataFrame
-                        year_month_data = []
-                        for year, months in data["time"]["year_month_counts"].items():
-                            for month, count in months.items():
-                                year_month_data.append({"year": year, "month": month, "count": count})
-                        year_month_df = pd.DataFrame(year_month_data)
+                    _plot(fig_line, key="time_year_line")
                     
-                    # Convert year to numeric if it's not already
-                    year_month_df["year"] = pd.to_numeric(year_month_df["year"], errors="coerce")
+                    # Add a note about panning to see older data
+                    st.info("💡 **Tips:** Use the 'Pan' tool in the chart toolbar to drag and see historical data before 1900. Double-click anywhere on the chart to reset the view.")
                     
-                    # Drop rows with NaN years
-                    year_month_df = year_month_df.dropna(subset=["year"])
+                    # Create a histogram by decades
+                    year_df["decade"] = (year_df["year"] // 10) * 10
+                    decade_counts = year_df.groupby("decade")["count"].sum().reset_index()
                     
-                    # Create a pivot table for the heatmap
-                    if not year_month_df.empty:
-                        # Sort years and ensure month order
-                        month_order = [
-                            "January", "February", "March", "April", "May", "June",
-                            "July", "August", "September", "October", "November", "December"
-                        ]
-                        
-                        # Filter to include only known months
-                        year_month_df = year_month_df[year_month_df["month"].isin(month_order)]
-                        
-                        # Create pivot table
-                        heatmap_data = year_month_df.pivot_table(
-                            values="count", 
-                            index="year", 
-                            columns="month", 
-                            aggfunc="sum",
-                            fill_value=0
-                        )
-                        
-                        # Reorder months
-                        if all(month in heatmap_data.columns for month in month_order):
-                            heatmap_data = heatmap_data[month_order]
-                        
-                        # Create heatmap
-                        fig_heatmap = px.imshow(
-                            heatmap_data,
-                            labels=dict(x="Month", y="Year", color="Count"),
-                            x=heatmap_data.columns,
-                            y=heatmap_data.index,
-                            color_continuous_scale="Viridis",
-                            title="Hauntings by Year and Month"
+                    fig_bar = px.bar(
+                        decade_counts,
+                        x="decade",
+                        y="count",
+                        title="Hauntings by Decade",
+                        color="count",
+                        color_continuous_scale="Viridis"
+                    )
+                    fig_bar.update_layout(
+                        xaxis_title="Decade",
+                        yaxis_title="Number of Reported Hauntings",
+                        xaxis=dict(
+                            tickmode="array", 
+                            tickvals=list(decade_counts["decade"]),
+                            # Set default range from 1900 to current
+                            range=[1900, current_year],
+                            autorange=False
                         )
-                        
-                        st.plotly_chart(fig_heatmap, use_container_width=True)
-                    else:
-                        st.warning("Insufficient data for year-month heatmap.")
+                    )
                     
-                except Exception as e:
-                    st.error(f"Error displaying year-month heatmap: {e}")
-            
-            # Display raw data as fallback
-            with st.expander("View Raw Time Analysis Data"):
-                for key in ["year_counts", "month_counts", "time_of_day_counts", "year_month_counts"]:
-                    if key in data["time"]:
-                        st.subheader(f"Raw {key.replace('_', ' ').title()} Data")
-                        st.write(data["time"][key])
-        else:
-            st.error("Time analysis data not available. Please run the data processing script.")
-    
-    # Evidence Analysis Tab
-    with tab3:
-        st.header("Paranormal Evidence Analysis")
+                    _plot(fig_bar, key="time_decade_bar")
+                    
+            except Exception as e:
+                st.error(f"Error displaying year analysis: {e}")
         
-        if data["evidence"] and any(key in data["evidence"] for key in ["evidence_counts", "apparition_counts"]):
-            # Create two-column layout
-            col1, col2 = st.columns(2)
-            
-            # Process evidence types
-            with col1:
-                if "evidence_counts" in data["evidence"]:
+        # Month and Time of Day analysis
+        if "month_counts" in data["time"] or "time_of_day_counts" in data["time"]:
+            with col2:
+                # Month analysis
+                if "month_counts" in data["time"]:
                     try:
-                        st.subheader("Types of Evidence Reported")
+                        st.subheader("Seasonal Patterns of Hauntings")
                         
-                        # Convert to DataFrame
-                        if isinstance(data["evidence"]["evidence_counts"], list):
-                            # If it's a list of dictionaries
-                            evidence_df = pd.DataFrame(data["evidence"]["evidence_counts"])
-                            if "type" not in evidence_df.columns and "name" in evidence_df.columns:
-                                evidence_df = evidence_df.rename(columns={"name": "type"})
-                            if "count" not in evidence_df.columns and "value" in evidence_df.columns:
-                                evidence_df = evidence_df.rename(columns={"value": "count"})
-                        else:
-                            # If it's a dictionary
-                            evidence_df = pd.DataFrame({
-                                "type": list(data["evidence"]["evidence_counts"].keys()),
-                                "count": list(data["evidence"]["evidence_counts"].values())
-                            })
+                        month_df = _frame(data, "month_counts")
                         
-                        # Sort by count descending
-                        evidence_df = evidence_df.sort_values("count", ascending=False)
+                        # Create a category for month with proper ordering
+                        if month_df["month"].isin(MONTH_SET).all():
+                            month_df["month"] = pd.Categorical(month_df["month"], categories=MONTH_ORDER, ordered=True)
+                            month_df = month_df.sort_values("month")
                         
-                        # Create a pie chart for evidence types
-                        fig_pie = px.pie(
-                            evidence_df,
-                            values="count",
-                            names="type",
-                            title="Distribution of Evidence Types",
-                            hover_data=["count"],
-                            color_discrete_sequence=px.colors.qualitative.Set2
+                        # Create a polar chart for months
+                        fig_polar = px.line_polar(
+                            month_df, 
+                            r="count", 
+                            theta="month",
+                            line_close=True,
+                            title="Monthly Distribution of Hauntings",
+                            color_discrete_sequence=["rgba(31, 119, 180, 0.8)"]
                         )
-                        fig_pie.update_traces(textposition='inside', textinfo='percent+label')
+                        fig_polar.update_traces(fill='toself')
                         
-                        st.plotly_chart(fig_pie, use_container_width=True)
+                        _plot(fig_polar, key="time_month_polar")
                         
-                        # Create a bar chart for evidence types
+                        # Create a bar chart for months
                         fig_bar = px.bar(
-                            evidence_df,
-                            y="type",
-                            x="count",
-                            title="Evidence Types by Frequency",
+                            month_df,
+                            x="month",
+                            y="count",
+                            title="Hauntings by Month",
                             color="count",
-                            color_continuous_scale="Viridis",
-                            orientation="h"
+                            color_continuous_scale="Viridis"
+                        )
+                        
+                        fig_bar.update_layout(
+                            xaxis_title="Month",
+                            yaxis_title="Number of Reported Hauntings"
                         )
-                        fig_bar.update_layout(yaxis_title="Evidence Type", xaxis_title="Frequency")
                         
-                        st.plotly_chart(fig_bar, use_container_width=True)
+                        # Group months by season
+                        month_df["season"] = month_df["month"].map(SEASON_MAP)
+                        season_counts = month_df.groupby("season")["count"].sum().reset_index()
+                        
+                        # Ensure proper season order
+                        season_counts["season"] = pd.Categorical(
+                            season_counts["season"], 
+                            categories=SEASON_ORDER, 
+                            ordered=True
+                        )
+                        season_counts = season_counts.sort_values("season")
                         
-                        # Create a treemap for evidence types
-                        fig_treemap = px.treemap(
-                            evidence_df,
-                            path=["type"],
+                        # Create a pie chart for seasons
+                        fig_pie = px.pie(
+                            season_counts,
                             values="count",
-                            title="Treemap of Evidence Types",
-                            color="count",
-                            color_continuous_scale="Viridis"
+                            names="season",
+                            title="Hauntings by Season",
+                            color="season",
+                            color_discrete_map=SEASON_COLORS
                         )
                         
-                        st.plotly_chart(fig_treemap, use_container_width=True)
+                        _plot(fig_pie, key="time_season_pie")
                         
-                        # Show evidence types with counts in a data table
-                        st.dataframe(evidence_df, use_container_width=True)
                     except Exception as e:
-                        st.error(f"Error displaying evidence types: {e}")
-            
-            # Process apparition types
-            with col2:
-                if "apparition_counts" in data["evidence"]:
+                        st.error(f"Error displaying month analysis: {e}")
+                
+                # Time of Day analysis
+                if "time_of_day_counts" in data["time"]:
                     try:
-                        st.subheader("Types of Apparitions Reported")
+                        st.subheader("Time of Day Analysis")
                         
-                        # Convert to DataFrame
-                        if isinstance(data["evidence"]["apparition_counts"], list):
-                            # If it's a list of dictionaries
-                            apparition_df = pd.DataFrame(data["evidence"]["apparition_counts"])
-                            # Ensure columns are correct
-                            if "type" not in apparition_df.columns:
-                                if "apparition_type" in apparition_df.columns:
-                                    apparition_df = apparition_df.rename(columns={"apparition_type": "type"})
-                                elif "name" in apparition_df.columns:
-                                    apparition_df = apparition_df.rename(columns={"name": "type"})
-                            # Ensure count column exists
-                            if "count" not in apparition_df.columns and "value" in apparition_df.columns:
-                                apparition_df = apparition_df.rename(columns={"value": "count"})
-                        else:
-                            # If it's a dictionary
-                            apparition_df = pd.DataFrame({
-                                "type": list(data["evidence"]["apparition_counts"].keys()),
-                                "count": list(data["evidence"]["apparition_counts"].values())
-                            })
+                        time_df = _frame(data, "time_of_day_counts")
                         
-                        # Sort by count descending
-                        apparition_df = apparition_df.sort_values("count", ascending=False)
+                        # Create a category for time with proper ordering
+                        if time_df["time_of_day"].isin(TIME_SET).all():
+                            time_df["time_of_day"] = pd.Categorical(time_df["time_of_day"], categories=TIME_ORDER, ordered=True)
+                            time_df = time_df.sort_values("time_of_day")
                         
-                        # Create a pie chart for apparition types
+                        # Create a pie chart for time of day
                         fig_pie = px.pie(
-                            apparition_df,
+                            time_df,
                             values="count",
-                            names="type",
-                            title="Distribution of Apparition Types",
-                            hover_data=["count"],
-                            color_discrete_sequence=px.colors.qualitative.Set3
+                            names="time_of_day",
+                            title="Hauntings by Time of Day",
+                            color="time_of_day",
+                            color_discrete_map=TIME_COLORS
                         )
-                        fig_pie.update_traces(textposition='inside', textinfo='percent+label')
                         
-                        st.plotly_chart(fig_pie, use_container_width=True)
+                        _plot(fig_pie, key="time_of_day_pie")
                         
-                        # Create a bar chart for apparition types
-                        fig_bar = px.bar(
-                            apparition_df,
-                            y="type",
-                            x="count",
-                            title="Apparition Types by Frequency",
-                            color="count",
-                            color_continuous_scale="Viridis",
-                            orientation="h"
-                        )
-                        fig_bar.update_layout(yaxis_title="Apparition Type", xaxis_title="Frequency")
+                        # Create a half-circle gauge chart
+                        fig_gauge = go.Figure()
                         
-                        st.plotly_chart(fig_bar, use_container_width=True)
+                        # Add a curved bar for each time of day
+                        total = time_df["count"].sum()
+                        cumulative = 0
                         
-                        # Create a sunburst chart for apparition types
-                        fig_sunburst = px.sunburst(
-                            apparition_df,
-                            path=["type"],
-                            values="count",
-                            title="Sunburst of Apparition Types",
-                            color="count",
-                            color_continuous_scale="Viridis"
+                        for i, row in time_df.iterrows():
+                            value = row["count"] / total
+                            fig_gauge.add_trace(go.Barpolar(
+                                r=[value],
+                                theta=[180],  # Center the bar
+                                width=[180],  # Cover half the circle
+                                base=cumulative,
+                                marker_color=TIME_COLORS.get(row["time_of_day"], "#000000"),
+                                name=f"{row['time_of_day']} ({row['count']} hauntings)",
+                                hoverinfo="name+text",
+                                text=[f"{row['count']} hauntings ({value:.1%})"]
+                            ))
+                            cumulative += value
+                        
+                        # Update layout for the gauge
+                        fig_gauge.update_layout(
+                            title="Time of Day Distribution",
+                            polar=dict(
+                                radialaxis=dict(visible=False, range=[0, 1]),
+                                angularaxis=dict(
+                                    visible=True,
+                                    type="category",
+                                    tickvals=[0, 45, 90, 135, 180],
+                                    ticktext=["Dawn", "Morning", "Noon", "Evening", "Midnight"],
+                                    direction="clockwise"
+                                )
+                            ),
+                            showlegend=True
                         )
                         
-                        st.plotly_chart(fig_sunburst, use_container_width=True)
+                        _plot(fig_gauge, key="time_of_day_gauge")
                         
-                        # Show apparition types with counts in a data table
-                        st.dataframe(apparition_df, use_container_width=True)
                     except Exception as e:
-                        st.error(f"Error displaying apparition types: {e}")
-            
-            # If we have both evidence and apparition data, show correlation
-            if "evidence_counts" in data["evidence"] and "apparition_counts" in data["evidence"] and "correlations" in data["evidence"]:
+                        st.error(f"Error displaying time of day analysis: {e}")
+        
+        # Combined year and month heatmap
+        if "year_counts" in data["time"] and "month_counts" in data["time"] and "year_month_counts" in data["time"]:
+            try:
+                st.subheader("Detailed Temporal Patterns")
+                
+                year_month_df = _frame(data, "year_month_counts")
+                
+                # Convert year to numeric if it's not already
+                year_month_df["year"] = pd.to_numeric(year_month_df["year"], errors="coerce")
+                
+                # Drop rows with NaN years
+                year_month_df = year_month_df.dropna(subset=["year"])
+                
+                # Create a pivot table for the heatmap
+                if not year_month_df.empty:
+                    # Filter to include only known months
+                    year_month_df = year_month_df[year_month_df["month"].isin(MONTH_SET)]
+                    
+                    # Create pivot table
+                    heatmap_data = year_month_df.pivot_table(
+                        values="count", 
+                        index="year", 
+                        columns="month", 
+                        aggfunc="sum",
+                        fill_value=0
+                    )
+                    
+                    # Reorder months
+                    if MONTH_SET.issubset(heatmap_data.columns):
+                        heatmap_data = heatmap_data[list(MONTH_ORDER)]
+                    
+                    # Create heatmap
+                    fig_heatmap = px.imshow(
+                        heatmap_data,
+                        labels=dict(x="Month", y="Year", color="Count"),
+                        x=heatmap_data.columns,
+                        y=heatmap_data.index,
+                        color_continuous_scale="Viridis",
+                        title="Hauntings by Year and Month"
+                    )
+                    # Keep zoom/pan state when the tab reruns
+                    fig_heatmap.update_layout(uirevision="year_month")
+                    
+                    _plot(fig_heatmap, key="time_year_month_heatmap")
+                else:
+                    st.warning("Insufficient data for year-month heatmap.")
+                
+            except Exception as e:
+                st.error(f"Error displaying year-month heatmap: {e}")
+        
+        # Display raw data as fallback
+        with st.expander("View Raw Time Analysis Data", expanded=False):
+            _render_raw_data(data["time"], ("year_counts", "month_counts", "time_of_day_counts", "year_month_counts"), "time")
+    else:
+        st.error("Time analysis data not available. Please run the data processing script.")
+
+@fragment
+def _render_evidence_tab(data):
+    """Evidence analysis tab of the D3 visualizations page"""
+    st.header("Paranormal Evidence Analysis")
+    
+    if data["evidence"] and any(key in data["evidence"] for key in ["evidence_counts", "apparition_counts"]):
+        # Create two-column layout
+        col1, col2 = st.columns(2)
+        
+        # Process evidence types
+        with col1:
+            if "evidence_counts" in data["evidence"]:
                 try:
-                    st.subheader("Correlations Between Evidence and Apparitions")
+                    st.subheader("Types of Evidence Reported")
                     
-                    # Check if correlations is a nested dictionary or a list
-                    if isinstance(data["evidence"]["correlations"], dict):
-                        # Convert nested dictionary to list of records
-                        correlations = []
-                        for ev_type, app_dict in data["evidence"]["correlations"].items():
-                            for app_type, count in app_dict.items():
-                                correlations.append({
-                                    "evidence_type": ev_type,
-                                    "apparition_type": app_type,
-                                    "count": count
-                                })
-                    else:
-                        # Assume it's already a list of records
-                        correlations = data["evidence"]["correlations"]
+                    evidence_df = _frame(data, "evidence_counts")
                     
-                    # Convert to DataFrame
-                    corr_df = pd.DataFrame(correlations)
+                    # Create a pie chart for evidence types
+                    fig_pie = px.pie(
+                        evidence_df,
+                        values="count",
+                        names="type",
+                        title="Distribution of Evidence Types",
+                        hover_data=["count"],
+                        color_discrete_sequence=SET2
+                    )
+                    fig_pie.update_traces(textposition='inside', textinfo='percent+label')
                     
-                    # Check if we have correlation data
-                    if not corr_df.empty and "evidence_type" in corr_df.columns and "apparition_type" in corr_df.columns and "count" in corr_df.columns:
-                        # Create a heatmap of correlations
-                        corr_pivot = corr_df.pivot_table(
-                            index="evidence_type", 
-                            columns="apparition_type", 
-                            values="count",
-                            fill_value=0
-                        )
-                        
-                        # Create heatmap
-                        fig_heatmap = px.imshow(
-                            corr_pivot,
-                            labels=dict(x="Apparition Type", y="Evidence Type", color="Count"),
-                            x=corr_pivot.columns,
-                            y=corr_pivot.index,
-                            color_continuous_scale="Viridis",
-                            title="Correlation Between Evidence and Apparition Types"
-                        )
-                        
-                        st.plotly_chart(fig_heatmap, use_container_width=True)
-                        
-                        # Create a sankey diagram if we have reasonable amount of data
-                        if len(corr_df) <= 50:  # Limit to avoid too complex diagrams
-                            # Prepare data for Sankey diagram
-                            # First, create unique IDs for each node
-                            evidence_types = list(corr_df["evidence_type"].unique())
-                            apparition_types = list(corr_df["apparition_type"].unique())
-                            
-                            # Create node labels
-                            node_labels = evidence_types + apparition_types
-                            
-                            # Create source-target pairs
-                            sources = []
-                            targets = []
-                            values = []
-                            
-                            for _, row in corr_df.iterrows():
-                                if row["count"] > 0:  # Only include non-zero connections
-                                    source_idx = evidence_types.index(row["evidence_type"])
-                                    target_idx = len(evidence_types) + apparition_types.index(row["apparition_type"])
-                                    sources.append(source_idx)
-                                    targets.append(target_idx)
-                                    values.append(row["count"])
-                            
-                            # Create Sankey diagram
-                            fig_sankey = go.Figure(data=[go.Sankey(
-                                node=dict(
-                                    pad=15,
-                                    thickness=20,
-                                    line=dict(color="black", width=0.5),
-                                    label=node_labels,
-                                    color=["rgba(31, 119, 180, 0.8)"] * len(evidence_types) + 
-                                          ["rgba(255, 127, 14, 0.8)"] * len(apparition_types)
-                                ),
-                                link=dict(
-                                    source=sources,
-                                    target=targets,
-                                    value=values
-                                )
-                            )])
-                            
-                            fig_sankey.update_layout(
-                                title_text="Evidence to Apparition Type Flows",
-                                font_size=12
-                            )
-                            
-                            st.plotly_chart(fig_sankey, use_container_width=True)
-                    else:
-                        st.warning("Correlation data format is not as expected.")
+                    _plot(fig_pie, key="ev_evidence_pie")
+                    
+                    # Create a bar chart for evidence types
+                    fig_bar = _bar(
+                        evidence_df,
+                        y="type",
+                        x="count",
+                        title="Evidence Types by Frequency",
+                        yaxis_title="Evidence Type",
+                        xaxis_title="Frequency"
+                    )
+                    
+                    _plot(fig_bar, key="ev_evidence_bar")
+                    
+                    # Create a treemap for evidence types
+                    fig_treemap = px.treemap(
+                        evidence_df,
+                        path=["type"],
+                        values="count",
+                        title="Treemap of Evidence Types",
+                        color="count",
+                        color_continuous_scale="Viridis"
+                    )
+                    
+                    _plot(fig_treemap, key="ev_evidence_treemap")
+                    
+                    # Show evidence types with counts in a data table
+                    st.dataframe(evidence_df, use_container_width=True)
                 except Exception as e:
-                    st.error(f"Error displaying correlation between evidence and apparitions: {e}")
-            
-            # Display raw data as fallback
-            with st.expander("View Raw Evidence Analysis Data"):
-                for key in ["evidence_counts", "apparition_counts", "correlations"]:
-                    if key in data["evidence"]:
-                        st.subheader(f"Raw {key.replace('_', ' ').title()} Data")
-                        st.write(data["evidence"][key])
-        else:
-            st.error("Evidence analysis data not available. Please run the data processing script.")
-    
-    # Location Analysis Tab
-    with tab4:
-        st.header("Geographic Analysis of Hauntings")
+                    st.error(f"Error displaying evidence types: {e}")
         
-        if data["location"] and any(key in data["location"] for key in ["state_counts", "country_counts", "city_counts"]):
-            # Create columns for analyses
-            col1, col2 = st.columns(2)
-            
-            # Process and display state distribution
-            with col1:
-                if "state_counts" in data["location"]:
-                    try:
-                        st.subheader("Hauntings by State/Province")
-                        
-                        # Convert to DataFrame based on format
-                        if isinstance(data["location"]["state_counts"], list):
-                            # If it's a list of dictionaries
-                            state_df = pd.DataFrame(data["location"]["state_counts"])
-                            if "state" not in state_df.columns and "name" in state_df.columns:
-                                state_df = state_df.rename(columns={"name": "state"})
-                            if "count" not in state_df.columns and "value" in state_df.columns:
-                                state_df = state_df.rename(columns={"value": "count"})
-                        else:
-                            # If it's a dictionary
-                            state_df = pd.DataFrame({
-                                "state": list(data["location"]["state_counts"].keys()),
-                                "count": list(data["location"]["state_counts"].values())
-                            })
-                        
-                        # Display US choropleth if we have US states
-                        us_states = set([
-                            'AL', 'AK', 'AZ', 'AR', 'CA', 'CO', 'CT', 'DE', 'FL', 'GA',
-                            'HI', 'ID', 'IL', 'IN', 'IA', 'KS', 'KY', 'LA', 'ME', 'MD',
-                            'MA', 'MI', 'MN', 'MS', 'MO', 'MT', 'NE', 'NV', 'NH', 'NJ',
-                            'NM', 'NY', 'NC', 'ND', 'OH', 'OK', 'OR', 'PA', 'RI', 'SC',
-                            'SD', 'TN', 'TX', 'UT', 'VT', 'VA', 'WA', 'WV', 'WI', 'WY'
-                        ])
-                        
-                        # Convert state codes to uppercase for comparison
-                        state_df["state_upper"] = state_df["state"].str.upper() if state_df["state"].dtype == 'object' else state_df["state"]
-                        
-                        # Check if we have mostly US states
-                        us_state_count = sum(1 for state in state_df["state_upper"] if state in us_states)
-                        
-                        if us_state_count > len(state_df) * 0.5:  # If more than 50% are US states
-                            # Filter to just US states and create a choropleth
-                            us_df = state_df[state_df["state_upper"].isin(us_states)]
-                            
-                            # Only create choropleth if we have enough US states
-                            if len(us_df) > 5:
-                                fig_choropleth = px.choropleth(
-                                    us_df,
-                                    locations="state_upper",
-                                    locationmode="USA-states",
-                                    color="count",
-                                    scope="usa",
-                                    color_continuous_scale="Viridis",
-                                    labels={"count": "Number of Hauntings", "state_upper": "State"},
-                                    title="US States Haunting Heat Map"
-                                )
-                                st.plotly_chart(fig_choropleth, use_container_width=True)
-                        
-                        # Sort and limit to top states for bar chart
-                        state_df = state_df.sort_values("count", ascending=False)
-                        
-                        # Show top 15 states/provinces
-                        top_states = state_df.head(15)
-                        
-                        # Create a bar chart for top states
-                        fig_bar = px.bar(
-                            top_states,
-                            y="state",
-                            x="count",
-                            title=f"Top {len(top_states)} States/Provinces with Most Hauntings",
-                            color="count",
-                            color_continuous_scale="Viridis",
-                            orientation="h"
-                        )
-                        fig_bar.update_layout(yaxis_title="State/Province", xaxis_title="Number of Hauntings")
-                        
-                        st.plotly_chart(fig_bar, use_container_width=True)
-                        
-                        # Show states with counts in a data table with search
-                        st.subheader("Search States/Provinces")
-                        st.dataframe(state_df[["state", "count"]].reset_index(drop=True), use_container_width=True)
-                    except Exception as e:
-                        st.error(f"Error displaying state distribution: {e}")
-            
-            # Haunting density analysis
-            with col2:
-                # Region distribution instead of country (since it's all USA)
-                if 'country_counts' in data["location"]:
-                    try:
-                        # Since it's all USA data, let's show something more useful
-                        st.subheader("Haunting Density Analysis")
-                        
-                        if 'state_counts' in data["location"]:
-                            # Create an analysis of haunting density by state population
-                            # Approximate state populations (for demonstration)
-                            state_populations = {
-                                "california": 39.5, "texas": 29.0, "florida": 21.5, "new york": 19.5, 
-                                "pennsylvania": 12.8, "illinois": 12.7, "ohio": 11.7, "georgia": 10.6,
-                                "north carolina": 10.4, "michigan": 10.0, "new jersey": 9.0, 
-                                "virginia": 8.5, "washington": 7.6, "arizona": 7.2, "massachusetts": 7.0,
-                                "tennessee": 6.9, "indiana": 6.7, "missouri": 6.1, "maryland": 6.0,
-                                "wisconsin": 5.8, "colorado": 5.7, "minnesota": 5.6, "south carolina": 5.1,
-                                "alabama": 5.0, "louisiana": 4.6, "kentucky": 4.5, "oregon": 4.2,
-                                "oklahoma": 4.0, "connecticut": 3.6, "utah": 3.2, "iowa": 3.2,
-                                "nevada": 3.1, "arkansas": 3.0, "mississippi": 3.0, "kansas": 2.9,
-                                "new mexico": 2.1, "nebraska": 1.9, "west virginia": 1.8, "idaho": 1.8,
-                                "hawaii": 1.4, "new hampshire": 1.4, "maine": 1.3, "montana": 1.1,
-                                "rhode island": 1.1, "delaware": 1.0, "south dakota": 0.9, 
-                                "north dakota": 0.8, "alaska": 0.7, "vermont": 0.6, "wyoming": 0.6,
-                                "washington dc": 0.7
-                            }
-                            
-                            # Convert state counts to DataFrame
-                            if isinstance(data["location"]["state_counts"], list):
-                                state_df = pd.DataFrame(data["location"]["state_counts"])
-                            else:
-                                state_df = pd.DataFrame({
-                                    "state": list(data["location"]["state_counts"].keys()),
-                                    "count": list(data["location"]["state_counts"].values())
-                                })
-                            
-                            # Normalize state names
-                            state_df["state_lower"] = state_df["state"].str.lower()
-                            
-                            # Add population data and calculate haunting density
-                            state_df["population_millions"] = state_df["state_lower"].map(state_populations)
-                            state_df["hauntings_per_million"] = state_df["count"] / state_df["population_millions"]
-                            
-                            # Filter out states with missing population data
-                            state_df = state_df.dropna(subset=["population_millions"])
-                            
-                            # Sort by haunting density
-                            state_df = state_df.sort_values("hauntings_per_million", ascending=False).head(15)
-                            
-                            # Create bar chart of haunting density
-                            fig = px.bar(
-                                state_df,
-                                y="state",
-                                x="hauntings_per_million",
-                                title="Top 15 States by Haunting Density (Hauntings per Million People)",
-                                color="hauntings_per_million",
-                                color_continuous_scale="Viridis",
-                                orientation="h"
-                            )
-                            fig.update_layout(yaxis_title="State", xaxis_title="Hauntings per Million People")
-                            
-                            st.plotly_chart(fig, use_container_width=True)
-                            
-                            # Add some interesting stats
-                            highest_density = state_df.iloc[0]
-                            st.info(f"**Interesting Fact:** {highest_density['state']} has the highest haunting density with {highest_density['hauntings_per_million']:.1f} hauntings per million residents!")
-                        else:
-                            st.info("No state count data available for density analysis.")
-                    except Exception as e:
-                        st.error(f"Error displaying haunting density: {e}")
-                else:
-                    st.info("No country data available")
-            
-            # City analysis in full width
-            if "city_counts" in data["location"]:
+        # Process apparition types
+        with col2:
+            if "apparition_counts" in data["evidence"]:
                 try:
-                    st.subheader("Top Cities with Hauntings")
+                    st.subheader("Types of Apparitions Reported")
                     
-                    # Convert to DataFrame based on format
-                    if isinstance(data["location"]["city_counts"], list):
-                        # If it's a list of dictionaries
-                        city_df = pd.DataFrame(data["location"]["city_counts"])
-                        if "city" not in city_df.columns and "name" in city_df.columns:
-                            city_df = city_df.rename(columns={"name": "city"})
-                        if "count" not in city_df.columns and "value" in city_df.columns:
-                            city_df = city_df.rename(columns={"value": "count"})
-                    else:
-                        # If it's a dictionary
-                        city_df = pd.DataFrame({
-                            "city": list(data["location"]["city_counts"].keys()),
-                            "count": list(data["location"]["city_counts"].values())
-                        })
+                    apparition_df = _frame(data, "apparition_counts")
                     
-                    # Sort by count in descending order
-                    city_df = city_df.sort_values("count", ascending=False)
+                    # Create a pie chart for apparition types
+                    fig_pie = px.pie(
+                        apparition_df,
+                        values="count",
+                        names="type",
+                        title="Distribution of Apparition Types",
+                        hover_data=["count"],
+                        color_discrete_sequence=SET3
+                    )
+                    fig_pie.update_traces(textposition='inside', textinfo='percent+label')
                     
-                    # Show top cities only (too many to show all)
-                    top_cities = city_df.head(20)
+                    _plot(fig_pie, key="ev_apparition_pie")
                     
-                    # Create a bar chart for cities
-                    fig_bar = px.bar(
-                        top_cities,
-                        y="city",
+                    # Create a bar chart for apparition types
+                    fig_bar = _bar(
+                        apparition_df,
+                        y="type",
                         x="count",
-                        title=f"Top {len(top_cities)} Cities with Most Hauntings",
+                        title="Apparition Types by Frequency",
+                        yaxis_title="Apparition Type",
+                        xaxis_title="Frequency"
+                    )
+                    
+                    _plot(fig_bar, key="ev_apparition_bar")
+                    
+                    # Create a sunburst chart for apparition types
+                    fig_sunburst = px.sunburst(
+                        apparition_df,
+                        path=["type"],
+                        values="count",
+                        title="Sunburst of Apparition Types",
                         color="count",
-                        color_continuous_scale="Viridis",
-                        orientation="h"
+                        color_continuous_scale="Viridis"
                     )
-                    fig_bar.update_layout(yaxis_title="City", xaxis_title="Number of Hauntings")
                     
-                    # Create columns for two charts
-                    col1, col2 = st.columns(2)
+                    _plot(fig_sunburst, key="ev_apparition_sunburst")
+                    
+                    # Show apparition types with counts in a data table
+                    st.dataframe(apparition_df, use_container_width=True)
+                except Exception as e:
+                    st.error(f"Error displaying apparition types: {e}")
+        
+        # If we have both evidence and apparition data, show correlation
+        if "evidence_counts" in data["evidence"] and "apparition_counts" in data["evidence"] and "correlations" in data["evidence"]:
+            try:
+                st.subheader("Correlations Between Evidence and Apparitions")
+                
+                # Correlation heatmap pivot (cached across reruns)
+                corr_df = _frame(data, "correlations")
+                corr_pivot = _build_correlation_pivot(corr_df)
+                
+                # Check if we have correlation data
+                if corr_pivot is not None:
+                    # Create heatmap
+                    fig_heatmap = px.imshow(
+                        corr_pivot,
+                        labels=dict(x="Apparition Type", y="Evidence Type", color="Count"),
+                        x=corr_pivot.columns,
+                        y=corr_pivot.index,
+                        color_continuous_scale="Viridis",
+                        title="Correlation Between Evidence and Apparition Types"
+                    )
+                    fig_heatmap.update_layout(uirevision="ev_app_corr")
                     
-                    with col1:
-                        st.plotly_chart(fig_bar, use_container_width=True)
+                    _plot(fig_heatmap, key="ev_app_corr_heatmap")
                     
-                    with col2:
-                        # Create a treemap for top cities
-                        fig_treemap = px.treemap(
-                            top_cities,
-                            path=["city"],
-                            values="count",
-                            title=f"Treemap of Top {len(top_cities)} Haunted Cities",
-                            color="count",
-                            color_continuous_scale="Viridis"
+                    # Create a sankey diagram if we have reasonable amount of data
+                    if len(corr_df) <= 50:  # Limit to avoid too complex diagrams
+                        # Prepare data for Sankey diagram
+                        # First, create unique IDs for each node
+                        evidence_types = list(corr_df["evidence_type"].unique())
+                        apparition_types = list(corr_df["apparition_type"].unique())
+                        
+                        # Create node labels
+                        node_labels = evidence_types + apparition_types
+                        
+                        # Create source-target pairs from categorical codes
+                        # Only include non-zero connections
+                        nz = corr_df[corr_df["count"] > 0]
+                        ev_cat = pd.Categorical(nz["evidence_type"], categories=evidence_types)
+                        app_cat = pd.Categorical(nz["apparition_type"], categories=apparition_types)
+                        sources = ev_cat.codes.tolist()
+                        targets = (app_cat.codes + len(evidence_types)).tolist()
+                        values = nz["count"].tolist()
+                        
+                        # Create Sankey diagram from a plain spec to skip per-node validation
+                        sankey_spec = {
+                            "type": "sankey",
+                            "node": {
+                                "pad": 15,
+                                "thickness": 20,
+                                "line": {"color": "black", "width": 0.5},
+                                "label": node_labels,
+                                "color": ["rgba(31, 119, 180, 0.8)"] * len(evidence_types) + 
+                                         ["rgba(255, 127, 14, 0.8)"] * len(apparition_types)
+                            },
+                            "link": {
+                                "source": sources,
+                                "target": targets,
+                                "value": values
+                            }
+                        }
+                        fig_sankey = go.Figure(
+                            {
+                                "data": [sankey_spec],
+                                "layout": {
+                                    "title": {"text": "Evidence to Apparition Type Flows"},
+                                    "font": {"size": 12}
+                                }
+                            },
+                            skip_invalid=True
                         )
                         
-                        st.plotly_chart(fig_treemap, use_container_width=True)
-                    
-                    # Show cities with counts in a searchable data table
-                    st.subheader("Search Cities")
-                    st.dataframe(city_df[["city", "count"]].reset_index(drop=True), use_container_width=True)
-                except Exception as e:
-                    st.error(f"Error displaying city distribution: {e}")
-            
-            # Display raw data as fallback
-            with st.expander("View Raw Location Analysis Data"):
-                for key in ["state_counts", "country_counts", "city_counts"]:
-                    if key in data["location"]:
-                        st.subheader(f"Raw {key.replace('_', ' ').title()} Data")
-                        st.write(data["location"][key])
-        else:
-            st.error("Location analysis data not available. Please run the data processing script.")
+                        _plot(fig_sankey, key="ev_app_sankey")
+                else:
+                    st.warning("Correlation data format is not as expected.")
+            except Exception as e:
+                st.error(f"Error displaying correlation between evidence and apparitions: {e}")
+        
+        # Display raw data as fallback
+        with st.expander("View Raw Evidence Analysis Data", expanded=False):
+            _render_raw_data(data["evidence"], ("evidence_counts", "apparition_counts", "correlations"), "evidence")
+    else:
+        st.error("Evidence analysis data not available. Please run the data processing script.")
+
+@fragment
+def _render_location_tab(data):
+    """Location analysis tab of the D3 visualizations page"""
+    st.header("Geographic Analysis of Hauntings")
     
-    # Correlation Analysis Tab
-    with tab5:
-        st.header("Correlation Analysis")
-        if data["correlation"] and "correlation_matrix" in data["correlation"]:
-            # Extract correlation matrix data
-            correlation_data = data["correlation"]["correlation_matrix"]
-            
-            # For simplified correlation visualization if the full matrix is too complex
-            if len(correlation_data) > 0:
-                # Try to create a simple heatmap visualization
+    if data["location"] and any(key in data["location"] for key in ["state_counts", "country_counts", "city_counts"]):
+        # Create columns for analyses
+        col1, col2 = st.columns(2)
+        
+        # Process and display state distribution
+        with col1:
+            if "state_counts" in data["location"]:
                 try:
-                    # Get unique variables - limit to just a few for visibility
-                    all_vars = sorted(list(set([item["x"] for item in correlation_data])))
+                    st.subheader("Hauntings by State/Province")
                     
-                    # Take just the first 6 variables for a cleaner visualization
-                    variables = all_vars[:6]
+                    state_df = _frame(data, "state_counts")
                     
-                    # Create a data frame for the correlation values
-                    # We need to convert the list of dicts to a pivoted DataFrame
-                    filtered_corr_data = [item for item in correlation_data 
-                                          if item["x"] in variables and item["y"] in variables]
+                    # Display US choropleth if we have US states
+                    # Check if we have mostly US states with a single scan of the column
+                    us_mask = state_df["state_upper"].isin(US_STATES)
+                    us_state_count = int(us_mask.sum())
                     
-                    # Create the correlation matrix manually
-                    matrix_dict = {}
-                    for var in variables:
-                        matrix_dict[var] = {}
-                        for other_var in variables:
-                            matrix_dict[var][other_var] = 0.0
-                    
-                    # Fill in correlation values
-                    for item in filtered_corr_data:
-                        x = item["x"]
-                        y = item["y"]
-                        if x in variables and y in variables:
-                            matrix_dict[x][y] = item["value"]
+                    # Only create choropleth if more than 50% are US states and we have enough of them
+                    if us_state_count > 5 and us_state_count > len(state_df) * 0.5:
+                        # Filter to just US states and create a choropleth
+                        us_df = state_df[us_mask]
+                        
+                        fig_choropleth = px.choropleth(
+                            us_df,
+                            locations="state_upper",
+                            locationmode="USA-states",
+                            color="count",
+                            scope="usa",
+                            color_continuous_scale="Viridis",
+                            labels={"count": "Number of Hauntings", "state_upper": "State"},
+                            title="US States Haunting Heat Map"
+                        )
+                        _plot(fig_choropleth, key="loc_state_choropleth")
                     
-                    # Convert to DataFrame with explicit index and columns
-                    corr_df = pd.DataFrame.from_dict(matrix_dict, orient='index')
-                    corr_df = corr_df.reindex(index=variables, columns=variables)
+                    # Show top 15 states/provinces
+                    top_states = state_df.head(15)
                     
-                    # Create heatmap - handle NaN values
-                    fig = px.imshow(
-                        corr_df.fillna(0),  # Replace NaN with 0
-                        text_auto=True,
-                        aspect="auto",
-                        color_continuous_scale="RdBu_r",
-                        title="Correlation Matrix of Haunted Places Data (Top 6 Variables)"
+                    # Create a bar chart for top states
+                    fig_bar = _bar(
+                        top_states,
+                        y="state",
+                        x="count",
+                        title=f"Top {len(top_states)} States/Provinces with Most Hauntings",
+                        yaxis_title="State/Province",
+                        xaxis_title="Number of Hauntings"
                     )
                     
-                    st.plotly_chart(fig, use_container_width=True)
-                    
-                    # Also create a simple table view for better readability
-                    st.markdown("### Correlation Matrix Table")
-                    st.dataframe(corr_df.style.background_gradient(cmap="RdBu_r"))
+                    _plot(fig_bar, key="loc_state_bar")
                     
+                    # Show states with counts in a data table with search
+                    st.subheader("Search States/Provinces")
+                    state_query = st.text_input("Filter states/provinces", key="state_filter")
+                    st.dataframe(_filter_table(state_df, "state", state_query), use_container_width=True, hide_index=True)
                 except Exception as e:
-                    st.error(f"Could not create correlation matrix visualization: {e}")
-                    
-                    # Display raw data as fallback
-                    st.write("Raw correlation data (sample):", correlation_data[:5])
+                    st.error(f"Error displaying state distribution: {e}")
+        
+        # Haunting density analysis
+        with col2:
+            # Region distribution instead of country (since it's all USA)
+            if 'country_counts' in data["location"]:
+                try:
+                    # Since it's all USA data, let's show something more useful
+                    st.subheader("Haunting Density Analysis")
                     
-                    # Simple text-based representation
-                    st.markdown("### Top Correlations")
-                    # Sort by absolute value and get top 10
-                    sorted_corr = sorted(correlation_data, 
-                                         key=lambda x: abs(x.get("value", 0) if isinstance(x.get("value"), (int, float)) else 0), 
-                                         reverse=True)[:10]
-                    for item in sorted_corr:
-                        if "x" in item and "y" in item and "value" in item:
-                            st.write(f"{item['x']} ↔ {item['y']}: {item['value']:.3f}")
+                    if 'state_counts' in data["location"]:
+                        # Haunting density by state population (cached across reruns)
+                        state_df = _build_density_df(_frame(data, "state_counts"))
+                        
+                        # Create bar chart of haunting density
+                        fig = _bar(
+                            state_df,
+                            y="state",
+                            x="hauntings_per_million",
+                            title="Top 15 States by Haunting Density (Hauntings per Million People)",
+                            yaxis_title="State",
+                            xaxis_title="Hauntings per Million People"
+                        )
+                        
+                        _plot(fig, key="loc_density_bar")
+                        
+                        # Add some interesting stats
+                        highest_density = state_df.iloc[0]
+                        st.info(f"**Interesting Fact:** {highest_density['state']} has the highest haunting density with {highest_density['hauntings_per_million']:.1f} hauntings per million residents!")
+                    else:
+                        st.info("No state count data available for density analysis.")
+                except Exception as e:
+                    st.error(f"Error displaying haunting density: {e}")
             else:
-                st.error("Correlation matrix is empty. Please run the data processing script.")
+                st.info("No country data available")
+        
+        # City analysis in full width
+        if "city_counts" in data["location"]:
+            try:
+                st.subheader("Top Cities with Hauntings")
+                
+                city_df = _frame(data, "city_counts")
+                
+                # Show top cities only (too many to show all)
+                top_cities = city_df.head(20)
+                
+                # Plotting-ready arrays shared by the bar chart and the treemap
+                counts = top_cities["count"].to_numpy()
+                cities = top_cities["city"].to_numpy()
+                bar_title = f"Top {len(top_cities)} Cities with Most Hauntings"
+                
+                # Create a bar chart for cities
+                fig_bar = go.Figure(
+                    go.Bar(
+                        x=counts,
+                        y=cities,
+                        orientation="h",
+                        marker=dict(color=counts, colorscale="Viridis", showscale=True)
+                    ),
+                    skip_invalid=True
+                )
+                fig_bar.update_layout(
+                    title=bar_title,
+                    yaxis_title="City",
+                    xaxis_title="Number of Hauntings",
+                    uirevision=bar_title
+                )
+                
+                # Create columns for two charts
+                col1, col2 = st.columns(2)
+                
+                with col1:
+                    _plot(fig_bar, key="loc_city_bar")
+                
+                with col2:
+                    # Create a treemap for top cities
+                    fig_treemap = go.Figure(
+                        go.Treemap(
+                            labels=cities,
+                            parents=[""] * len(cities),
+                            values=counts,
+                            marker=dict(colors=counts, colorscale="Viridis", showscale=True)
+                        ),
+                        skip_invalid=True
+                    )
+                    fig_treemap.update_layout(title=f"Treemap of Top {len(top_cities)} Haunted Cities")
+                    
+                    _plot(fig_treemap, key="loc_city_treemap")
+                
+                # Show cities with counts in a searchable data table
+                st.subheader("Search Cities")
+                city_query = st.text_input("Filter cities", key="city_filter")
+                st.dataframe(_filter_table(city_df, "city", city_query), use_container_width=True, hide_index=True)
+            except Exception as e:
+                st.error(f"Error displaying city distribution: {e}")
+        
+        # Display raw data as fallback
+        with st.expander("View Raw Location Analysis Data", expanded=False):
+            _render_raw_data(data["location"], ("state_counts", "country_counts", "city_counts"), "location")
+    else:
+        st.error("Location analysis data not available. Please run the data processing script.")
+
+@fragment
+def _render_correlation_tab(data):
+    """Correlation analysis tab of the D3 visualizations page"""
+    st.header("Correlation Analysis")
+    if data["correlation"] and "correlation_matrix" in data["correlation"]:
+        # Extract correlation matrix data
+        correlation_data = data["correlation"]["correlation_matrix"]
+        
+        # For simplified correlation visualization if the full matrix is too complex
+        if len(correlation_data) > 0:
+            # Try to create a simple heatmap visualization
+            try:
+                # Take just the first 6 variables for a cleaner visualization
+                corr_df = _build_correlation_matrix(correlation_data)
+                
+                # Create heatmap - handle NaN values
+                fig = px.imshow(
+                    corr_df.fillna(0),  # Replace NaN with 0
+                    text_auto=True,
+                    aspect="auto",
+                    color_continuous_scale="RdBu_r",
+                    title="Correlation Matrix of Haunted Places Data (Top 6 Variables)"
+                )
+                fig.update_layout(uirevision="corr_matrix")
+                
+                _plot(fig, key="corr_matrix_heatmap")
+                
+                # Also create a simple table view for better readability
+                st.markdown("### Correlation Matrix Table")
+                st.dataframe(corr_df.style.background_gradient(cmap="RdBu_r"))
+                
+            except Exception as e:
+                st.error(f"Could not create correlation matrix visualization: {e}")
+                
+                # Display raw data as fallback
+                st.write("Raw correlation data (sample):", correlation_data[:5])
+                
+                # Simple text-based representation
+                st.markdown("### Top Correlations")
+                # Sort by absolute value and get top 10
+                sorted_corr = sorted(correlation_data, 
+                                     key=lambda x: abs(x.get("value", 0) if isinstance(x.get("value"), (int, float)) else 0), 
+                                     reverse=True)[:10]
+                for item in sorted_corr:
+                    if "x" in item and "y" in item and "value" in item:
+                        st.write(f"{item['x']} ↔ {item['y']}: {item['value']:.3f}")
         else:
-            st.error("Correlation analysis data not available. Please run the data processing script.")
+            st.error("Correlation matrix is empty. Please run the data processing script.")
+    else:
+        st.error("Correlation analysis data not available. Please run the data processing script.")
+
 
 def add_data_status_tab():
     st.header("Data Storage Status")
@@ -1240,6 +1319,244 @@ def add_data_status_tab():
         st.subheader("Solr Status")
         st.info("Data processor configured for Solr ingestion")
 
+def _exact_colors(pixels, k):
+    """k most common exact colors of an (N, 3) uint8 pixel array"""
+    # Pad each pixel to 4 bytes and view the rows as single uint32 keys
+    padded = np.zeros((len(pixels), 4), dtype=np.uint8)
+    padded[:, :3] = pixels
+    values, counts = np.unique(padded.view(np.uint32).ravel(), return_counts=True)
+    
+    # Select the k most frequent keys in descending order
+    top = np.argpartition(counts, -min(k, len(counts)))[-k:]
+    top = top[np.argsort(-counts[top], kind="stable")]
+    
+    # Unpack the keys back into RGB triples
+    rgb = values[top].view(np.uint8).reshape(-1, 4)[:, :3]
+    return [(tuple(int(c) for c in color), int(count)) for color, count in zip(rgb, counts[top])]
+
+def dominant_colors(image, k=5, size=64):
+    """
+    Dominant colors of an image as [((r, g, b), pixel_count), ...]
+    Images with at most k distinct colors are counted exactly; otherwise pixels of
+    a thumbnail fitting in size x size are clustered with MiniBatchKMeans when
+    scikit-learn is installed, or reduced with Pillow's median-cut quantizer
+    """
+    # Let libjpeg skip most of the IDCT work on large, not yet decoded JPEGs
+    if image.format == "JPEG" and max(image.size) > 1024:
+        image.draft('RGB', (2 * size, 2 * size))
+    
+    # A small nearest-neighbour thumbnail keeps the color statistics at a fraction of the cost;
+    # resize returns the small image directly instead of copying the full one first
+    scale = size / max(image.size)
+    if scale < 1:
+        thumb_size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+        image = image.resize(thumb_size, Image.Resampling.NEAREST)
+    
+    # Only convert images that are not RGB already
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    pixels = np.asarray(image, dtype=np.uint8).reshape(-1, 3)
+    
+    # Flat images (logos, palette images) need no clustering; getcolors
+    # returns None as soon as there are more than k colors
+    if image.getcolors(k) is not None:
+        return _exact_colors(pixels, k)
+    
+    if MiniBatchKMeans is not None:
+        # Cluster centroids are perceptually meaningful colors, unlike exact pixel values
+        k = min(k, len(pixels))
+        km = MiniBatchKMeans(n_clusters=k, batch_size=1024, n_init=3, max_iter=50, random_state=0)
+        km.fit(pixels.astype(np.float32))
+        counts = np.bincount(km.labels_, minlength=k)
+        centers = km.cluster_centers_.round().clip(0, 255).astype(int)
+        return [
+            (tuple(int(c) for c in centers[i]), int(counts[i]))
+            for i in np.argsort(-counts, kind="stable")
+        ]
+    
+    # Median-cut quantization runs in C; getcolors counts pixels per palette index
+    quantized = image.quantize(colors=k, method=Image.Quantize.MEDIANCUT, dither=Image.Dither.NONE)
+    palette = quantized.getpalette()
+    return [
+        (tuple(palette[3 * index:3 * index + 3]), count)
+        for count, index in sorted(quantized.getcolors(k), reverse=True)
+    ]
+
+def _decode_image(img_bytes, size=(400, 400)):
+    """
+    Decode an image, letting JPEGs decode at a reduced scale (1/2, 1/4 or 1/8)
+    that still covers `size`
+    """
+    image = Image.open(io.BytesIO(img_bytes))
+    image.draft('RGB', size)
+    image.load()
+    return image
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _image_info(img_bytes):
+    """Format and original (width, height) of an image, read from its header only"""
+    image = Image.open(io.BytesIO(img_bytes))
+    return image.format, image.size
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def _preview_bytes(img_bytes, width=IMAGE_WIDTH):
+    """
+    Encoded preview no wider than `width`, built once per image
+    st.image re-decodes and resizes anything wider on every rerun
+    """
+    image = Image.open(io.BytesIO(img_bytes))
+    if image.width <= width:
+        return img_bytes
+    is_jpeg = image.format == "JPEG"
+    
+    # Decode JPEGs at a reduced scale, then shrink to the display width
+    image.draft('RGB', (width, width))
+    image.thumbnail((width, image.height), Image.Resampling.BILINEAR)
+    
+    buffer = io.BytesIO()
+    if is_jpeg or image.mode == "RGB":
+        image.convert('RGB').save(buffer, format="JPEG", quality=85)
+    else:
+        image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _dominant_colors(img_bytes, k=5):
+    """Dominant colors of an encoded image, cached per image bytes"""
+    image = _decode_image(img_bytes)
+    return dominant_colors(image, k)
+
+@st.cache_resource
+def _http():
+    """
+    One HTTP session for the process, so repeated downloads reuse pooled connections
+    Returns the session and a lock that serializes requests on its cookie jar
+    """
+    session = requests.Session()
+    session.headers["User-Agent"] = "haunted-places-explorer"
+    return session, threading.Lock()
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def _fetch(url):
+    """Raw bytes of a remote image, cached per URL"""
+    # Only the request touches the shared cookie jar; the body streams unlocked
+    session, lock = _http()
+    with lock:
+        response = session.get(url, stream=True, timeout=(5, 30))
+    
+    # Stream the body in 64 KiB chunks and refuse anything over the size cap
+    with response:
+        response.raise_for_status()
+        if int(response.headers.get("Content-Length") or 0) > MAX_IMAGE_BYTES:
+            raise ValueError("Image is too large")
+        
+        buffer = io.BytesIO()
+        for chunk in response.iter_content(65536):
+            buffer.write(chunk)
+            if buffer.tell() > MAX_IMAGE_BYTES:
+                raise ValueError("Image is too large")
+        return buffer.getvalue()
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _sample_places(limit=3):
+    """Sample haunted places shown as similarity placeholders"""
+    return data_store.get_documents("haunted_places", limit=limit)
+
+@st.cache_data(ttl="1h")
+def _all_states():
+    """Lowercased state names of all haunted places, collected once"""
+    return frozenset(doc['state'].lower() for doc in data_store.get_documents('haunted_places') if doc.get('state'))
+
+def _located_places(states):
+    """Places in the given states with numeric, non-zero coordinates"""
+    # One batched lookup for all states instead of one per state
+    places_df = pd.DataFrame(get_places_by_states(list(states)))
+    places_df = places_df.reindex(columns=["location", "description", "latitude", "longitude"])
+    
+    # Drop missing or zero coordinates in one vectorized pass
+    coords = places_df[["latitude", "longitude"]].apply(pd.to_numeric, errors="coerce")
+    places_df[["latitude", "longitude"]] = coords
+    places_df = places_df[coords.notna().all(axis=1) & coords.ne(0).all(axis=1)]
+    return places_df.fillna({"location": "Unknown", "description": "No description"})
+
+@st.cache_resource(ttl="1h")
+def _state_regex(states):
+    """One compiled case-insensitive alternation over the state names, longest names first"""
+    # Longest first so a name wins over a shorter one it starts with
+    alternation = "|".join(sorted(map(re.escape, states), key=len, reverse=True))
+    return re.compile(r'\b(' + alternation + r')\b', re.IGNORECASE)
+
+@st.cache_resource(ttl="1h")
+def _split_states(states):
+    """State names split into plain single words and the rest (multi-word, punctuated)"""
+    single = frozenset(state for state in states if state.isalpha() and state.isascii())
+    return single, states - single
+
+@functools.cache
+def _folium():
+    """folium and its plugins, imported on first use since only the GeoParser map needs them"""
+    import folium
+    from folium import plugins
+    return folium, plugins
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _render_folium_html(found):
+    """Standalone HTML of the GeoParser map with the places in the found states"""
+    folium, plugins = _folium()
+    m = folium.Map(location=[39.8283, -98.5795], zoom_start=4)
+    
+    # Haunted places with coordinates in the found states
+    places_df = _located_places(found)
+    
+    if len(places_df) < MAX_FULL_MARKERS:
+        # Few enough hits for markers with popups, emitted as one GeoJSON layer
+        rows = zip(places_df["latitude"], places_df["longitude"], places_df["location"], places_df["description"])
+        features = [
+            {
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [lon, lat]},
+                "properties": {
+                    "popup": f"<b>{location}</b><br>{str(description)[:100]}...",
+                    "tooltip": location,
+                },
+            }
+            for lat, lon, location, description in rows
+        ]
+        # The popup and tooltip templates read the first feature, so an empty
+        # layer would fail to render; leave the map empty instead
+        if features:
+            folium.GeoJson(
+                {"type": "FeatureCollection", "features": features},
+                popup=folium.GeoJsonPopup(fields=["popup"], labels=False),
+                tooltip=folium.GeoJsonTooltip(fields=["tooltip"], labels=False),
+            ).add_to(m)
+    else:
+        # Bulk-load the coordinates and cluster them client-side
+        plugins.FastMarkerCluster(places_df[["latitude", "longitude"]].to_numpy().tolist()).add_to(m)
+    
+    return m.get_root().render()
+
+def _find_states(text):
+    """Known state names mentioned in the text, multi-word names first"""
+    single, multi = _split_states(_all_states())
+    found = {}
+    
+    def _take(match):
+        found.setdefault(match.group(1).lower(), None)
+        return " "
+    
+    # Multi-word names go through one case-insensitive regex pass and are blanked
+    # out, so "west virginia" or "new york" do not also match "virginia" or "york"
+    if multi:
+        text = _state_regex(multi).sub(_take, text)
+    
+    # Single-word names: one \w+ tokenization, so words split where a \b search
+    # would, and hash lookups per word
+    for word in re.findall(r"\w+", text.lower()):
+        if word in single:
+            found.setdefault(word, None)
+    return list(found)
+
 def add_memex_tools_tab():
     """
     Add MEMEX tools tab to the Streamlit app
@@ -1247,330 +1564,173 @@ def add_memex_tools_tab():
     """
     st.header("MEMEX Tools")
     
-    tab1, tab2 = st.tabs(["ImageSpace", "GeoParser"])
+    tab1, tab2 = st.tabs(MEMEX_TAB_LABELS)
     
     with tab1:
-        st.subheader("Image Analysis with ImageSpace")
+        _render_imagespace_tab()
+    
+    with tab2:
+        _render_geoparser_tab()
+
+def _analyze_image(img_bytes, key_prefix):
+    """Analyze Image button and, once clicked, the analysis of one image"""
+    # Image analysis button
+    if not st.button("Analyze Image", key=f"{key_prefix}_analyze"):
+        return
+    
+    with st.spinner("Analyzing image..."):
+        # Header fields only; the colors below decode the image (cached per image)
+        image_format, (width, height) = _image_info(img_bytes)
+        
+        # Basic image analysis
+        st.write("**Image Information:**")
+        st.write(f"Dimensions: {width}x{height} pixels")
+        st.write(f"Format: {image_format}")
         
-        # Add instructions on viewing the Docker-based installation
-        st.info("""
-        For the full ImageSpace experience, the Docker container should be running at:
-        http://localhost:8080
+        # Extract color information
+        try:
+            # Count most common colors (cached per image)
+            most_common = _dominant_colors(img_bytes)
+            
+            st.write("**Dominant Colors:**")
+            # Display all color swatches in a single markdown element
+            swatches = "".join(
+                f'<div style="display: flex; align-items: center; margin-bottom: 10px;">'
+                f'<div style="width: 30px; height: 30px; background-color: rgb{color}; margin-right: 10px;"></div>'
+                f'<span>Color {i+1}: RGB{color} ({count} pixels)</span>'
+                f'</div>'
+                for i, (color, count) in enumerate(most_common)
+            )
+            st.markdown(swatches, unsafe_allow_html=True)
+        except Exception as e:
+            st.error(f"Error analyzing colors: {e}")
         
-        Below is a simplified version that works directly in Streamlit:
-        """)
+        # Find similar images
+        st.write("**Similar Haunted Places Images:**")
+        st.write("In the full ImageSpace application, this would show similar images based on visual features.")
         
-        # Option to upload an image or enter a URL
-        option = st.radio("Select an option:", ["Upload Image", "Enter Image URL"], key="image_option")
+        # Display sample similar images (placeholder, cached)
+        sample_places = _sample_places()
         
-        if option == "Upload Image":
-            uploaded_file = st.file_uploader("Choose an image...", type=["jpg", "jpeg", "png"], key="image_upload")
-            if uploaded_file is not None:
-                from PIL import Image
-                import io
+        if sample_places:
+            st.write("Based on image analysis, these haunted places might have similar characteristics:")
+            cols = st.columns(3)
+            for i, place in enumerate(sample_places):
+                with cols[i]:
+                    st.write(f"**{place.get('location', 'Unknown Location')}**")
+                    st.write(f"State: {place.get('state', 'Unknown')}")
+                    st.write(f"Evidence: {place.get('evidence', 'Unknown')}")
+        else:
+            st.info("No haunted places data available for similarity comparison.")
+
+@fragment
+def _render_imagespace_tab():
+    """ImageSpace tab of the MEMEX tools page"""
+    st.subheader("Image Analysis with ImageSpace")
+    
+    # Add instructions on viewing the Docker-based installation
+    st.info("""
+    For the full ImageSpace experience, the Docker container should be running at:
+    http://localhost:8080
+    
+    Below is a simplified version that works directly in Streamlit:
+    """)
+    
+    # Option to upload an image or enter a URL
+    option = st.radio("Select an option:", ["Upload Image", "Enter Image URL"], key="image_option")
+    
+    if option == "Upload Image":
+        uploaded_file = st.file_uploader("Choose an image...", type=["jpg", "jpeg", "png"], key="image_upload")
+        if uploaded_file is not None:
+            # Display a preview already downscaled to the display width (cached per image)
+            img_bytes = uploaded_file.getvalue()
+            st.image(_preview_bytes(img_bytes), caption="Uploaded Image", width=IMAGE_WIDTH)
+            
+            _analyze_image(img_bytes, "upload")
+    else:
+        url = st.text_input("Enter image URL:", key="image_url")
+        if url:
+            try:
+                # Download once per URL (cached across reruns)
+                content = _fetch(url)
                 
-                # Display the image
-                image = Image.open(uploaded_file)
-                st.image(image, caption="Uploaded Image", use_column_width=True)
+                # Display a preview already downscaled to the display width (cached per image)
+                st.image(_preview_bytes(content), caption="Image from URL", width=IMAGE_WIDTH)
                 
-                # Image analysis button
-                if st.button("Analyze Image", key="analyze_image"):
-                    with st.spinner("Analyzing image..."):
-                        # Basic image analysis
-                        st.write("**Image Information:**")
-                        st.write(f"Dimensions: {image.size[0]}x{image.size[1]} pixels")
-                        st.write(f"Format: {image.format}")
-                        
-                        # Extract color information
-                        try:
-                            from collections import Counter
-                            import numpy as np
-                            
-                            # Convert to numpy array
-                            img_array = np.array(image.convert('RGB').resize((100, 100)))
-                            
-                            # Reshape to get list of pixels
-                            pixels = img_array.reshape(-1, 3)
-                            
-                            # Count most common colors
-                            pixel_tuples = [tuple(pixel) for pixel in pixels]
-                            most_common = Counter(pixel_tuples).most_common(5)
-                            
-                            st.write("**Dominant Colors:**")
-                            for i, (color, count) in enumerate(most_common):
-                                # Display color as a swatch
-                                st.markdown(
-                                    f"""
-                                    <div style="display: flex; align-items: center; margin-bottom: 10px;">
-                                        <div style="width: 30px; height: 30px; background-color: rgb{color}; margin-right: 10px;"></div>
-                                        <span>Color {i+1}: RGB{color} ({count} pixels)</span>
-                                    </div>
-                                    """,
-                                    unsafe_allow_html=True
-                                )
-                        except Exception as e:
-                            st.error(f"Error analyzing colors: {e}")
-                        
-                        # Find similar images
-                        st.write("**Similar Haunted Places Images:**")
-                        st.write("In the full ImageSpace application, this would show similar images based on visual features.")
-                        
-                        # Display sample similar images (placeholder)
-                        from data_storage import data_store
-                        sample_places = data_store.get_documents("haunted_places", limit=3)
-                        
-                        if sample_places:
-                            st.write("Based on image analysis, these haunted places might have similar characteristics:")
-                            cols = st.columns(3)
-                            for i, place in enumerate(sample_places):
-                                with cols[i]:
-                                    st.write(f"**{place.get('location', 'Unknown Location')}**")
-                                    st.write(f"State: {place.get('state', 'Unknown')}")
-                                    st.write(f"Evidence: {place.get('evidence', 'Unknown')}")
-                        else:
-                            st.info("No haunted places data available for similarity comparison.")
-        else:
-            url = st.text_input("Enter image URL:", key="image_url")
-            if url:
-                try:
-                    import requests
-                    from PIL import Image
-                    import io
-                    
-                    response = requests.get(url)
-                    image = Image.open(io.BytesIO(response.content))
-                    
-                    # Display the image
-                    st.image(image, caption="Image from URL", use_column_width=True)
-                    
-                    # Image analysis button
-                    if st.button("Analyze Image", key="analyze_url_image"):
-                        with st.spinner("Analyzing image..."):
-                            # Basic image analysis
-                            st.write("**Image Information:**")
-                            st.write(f"Dimensions: {image.size[0]}x{image.size[1]} pixels")
-                            st.write(f"Format: {image.format}")
-                            
-                            # Extract color information (same as above)
-                            try:
-                                from collections import Counter
-                                import numpy as np
-                                
-                                # Convert to numpy array
-                                img_array = np.array(image.convert('RGB').resize((100, 100)))
-                                
-                                # Reshape to get list of pixels
-                                pixels = img_array.reshape(-1, 3)
-                                
-                                # Count most common colors
-                                pixel_tuples = [tuple(pixel) for pixel in pixels]
-                                most_common = Counter(pixel_tuples).most_common(5)
-                                
-                                st.write("**Dominant Colors:**")
-                                for i, (color, count) in enumerate(most_common):
-                                    st.markdown(
-                                        f"""
-                                        <div style="display: flex; align-items: center; margin-bottom: 10px;">
-                                            <div style="width: 30px; height: 30px; background-color: rgb{color}; margin-right: 10px;"></div>
-                                            <span>Color {i+1}: RGB{color} ({count} pixels)</span>
-                                        </div>
-                                        """,
-                                        unsafe_allow_html=True
-                                    )
-                            except Exception as e:
-                                st.error(f"Error analyzing colors: {e}")
-                            
-                            # Similarity placeholder (same as above)
-                            st.write("**Similar Haunted Places Images:**")
-                            st.write("In the full ImageSpace application, this would show similar images based on visual features.")
-                            
-                            from data_storage import data_store
-                            sample_places = data_store.get_documents("haunted_places", limit=3)
-                            
-                            if sample_places:
-                                st.write("Based on image analysis, these haunted places might have similar characteristics:")
-                                cols = st.columns(3)
-                                for i, place in enumerate(sample_places):
-                                    with cols[i]:
-                                        st.write(f"**{place.get('location', 'Unknown Location')}**")
-                                        st.write(f"State: {place.get('state', 'Unknown')}")
-                                        st.write(f"Evidence: {place.get('evidence', 'Unknown')}")
-                            else:
-                                st.info("No haunted places data available for similarity comparison.")
-                except Exception as e:
-                    st.error(f"Error loading image from URL: {e}")
+                _analyze_image(content, "url")
+            except Exception as e:
+                st.error(f"Error loading image from URL: {e}")
+
+@fragment
+def _render_geoparser_tab():
+    """GeoParser tab of the MEMEX tools page"""
+    st.subheader("Location Analysis with GeoParser")
     
-    with tab2:
-        st.subheader("Location Analysis with GeoParser")
-        
-        st.info("""
-        For the full GeoParser experience, the Docker container should be running at:
-        http://localhost:8081
-        
-        Below is a simplified version that works directly in Streamlit:
-        """)
-        
-        # Text input for GeoParser
-        text_input = st.text_area(
-            "Enter text containing location information:",
-            height=150,
-            key="geoparser_text"
-        )
-        
-        if st.button("Extract Locations", key="extract_locations"):
-            if text_input:
-                with st.spinner("Extracting locations..."):
-                    # In a real implementation, this would call the GeoParser API
-                    # For now, we'll use a simple placeholder implementation
-                    st.write("**Extracted Locations:**")
-                    
-                    # Simple location extraction (very naive implementation)
-                    import re
-                    from data_storage import data_store
-                    
-                    # Get all state names
-                    states = set()
-                    for doc in data_store.get_documents('haunted_places'):
-                        if 'state' in doc and doc['state']:
-                            states.add(doc['state'].lower())
-                    
-                    # Find state names in the text
-                    found_states = []
-                    for state in states:
-                        if re.search(r'\b' + re.escape(state) + r'\b', text_input.lower()):
-                            found_states.append(state)
+    st.info("""
+    For the full GeoParser experience, the Docker container should be running at:
+    http://localhost:8081
+    
+    Below is a simplified version that works directly in Streamlit:
+    """)
+    
+    # Text input for GeoParser
+    text_input = st.text_area(
+        "Enter text containing location information:",
+        height=150,
+        key="geoparser_text"
+    )
+    
+    if st.button("Extract Locations", key="extract_locations"):
+        if text_input:
+            with st.spinner("Extracting locations..."):
+                # In a real implementation, this would call the GeoParser API
+                # For now, we'll use a simple placeholder implementation
+                st.write("**Extracted Locations:**")
+                
+                # Find known state names in the text with a single scan
+                found_states = _find_states(text_input)
+                
+                if found_states:
+                    st.success(f"Found {len(found_states)} locations in the text.")
                     
-                    if found_states:
-                        st.success(f"Found {len(found_states)} locations in the text.")
-                        
-                        # Show locations on a map
-                        import folium
-                        from streamlit_folium import folium_static
-                        
-                        m = folium.Map(location=[39.8283, -98.5795], zoom_start=4)
-                        
-                        # Add markers for each found state
-                        for state in found_states:
-                            # Get all haunted places in this state
-                            from data_storage import get_places_by_state
-                            places = get_places_by_state(state)
-                            
-                            if places:
-                                for place in places:
-                                    if place.get('latitude') and place.get('longitude'):
-                                        popup_text = f"""
-                                        <b>{place.get('location', 'Unknown')}</b><br>
-                                        {place.get('description', 'No description')[:100]}...
-                                        """
-                                        folium.Marker(
-                                            [place.get('latitude'), place.get('longitude')],
-                                            popup=popup_text,
-                                            tooltip=place.get('location', 'Unknown')
-                                        ).add_to(m)
-                        
-                        # Display the map
-                        st.write("**Locations on map:**")
-                        folium_static(m)
-                    else:
-                        st.warning("No known locations found in the text.")
-            else:
-                st.warning("Please enter text to analyze.")
+                    # Display the map (rendered once per set of found states)
+                    st.write("**Locations on map:**")
+                    components.html(_render_folium_html(tuple(sorted(found_states))), height=500)
+                else:
+                    st.warning("No known locations found in the text.")
+        else:
+            st.warning("Please enter text to analyze.")
+
 
+# Placeholder page written when the D3 visualization file is missing
+_VIZ_DIR = Path("visualizations")
+_DEFAULT_INDEX = Path(__file__).resolve().parent / "visualizations" / "_default_index.html"
+
+@functools.cache
+def _default_d3_html():
+    """Bytes of the placeholder D3 page, read from disk on first use"""
+    return _DEFAULT_INDEX.read_bytes()
+
+@st.cache_resource
+def _write_default_d3_index():
+    """Write the placeholder D3 page, at most once per process"""
+    # Create directory for visualizations if it doesn't exist
+    _VIZ_DIR.mkdir(exist_ok=True)
+    
+    # Write a per-process temporary file and rename it into place, so other
+    # workers never read a partially written page
+    index_path = _VIZ_DIR / "index.html"
+    tmp_path = index_path.with_name(f"index.html.{os.getpid()}.tmp")
+    tmp_path.write_bytes(_default_d3_html())
+    os.replace(tmp_path, index_path)
 
 def setup_d3_file():
     """
     Create the D3 visualization HTML file if it doesn't exist
     """
-    # Create directory for visualizations if it doesn't exist
-    os.makedirs("visualizations", exist_ok=True)
-    
-    # Check if the main D3 visualization file exists
-    if not os.path.exists("visualizations/index.html"):
-        st.warning("D3 visualization file not found. You should create it with the D3 code provided.")
-        
-        # Create a basic HTML template for D3
-        with open("visualizations/index.html", "w") as f:
-            f.write("""
-            <!DOCTYPE html>
-            <html lang="en">
-            <head>
-                <meta charset="UTF-8">
-                <meta name="viewport" content="width=device-width, initial-scale=1.0">
-                <title>Haunted Places D3 Visualizations</title>
-                <script src="https://d3js.org/d3.v7.min.js"></script>
-                <script src="https://d3js.org/topojson.v3.min.js"></script>
-                <style>
-                    body { 
-                        font-family: Arial, sans-serif; 
-                        margin: 20px;
-                        background-color: #1a1a1a;
-                        color: #e0e0e0;
-                    }
-                    .visualization {
-                        margin-bottom: 40px;
-                        background-color: #2c2c2c;
-                        padding: 20px;
-                        border-radius: 8px;
-                    }
-                </style>
-            </head>
-            <body>
-                <h1>👻 Haunted Places D3 Visualizations</h1>
-                <p>Please replace this file with the complete D3 visualization code.</p>
-                
-                <div class="visualization">
-                    <h2>Map Visualization</h2>
-                    <div id="map-container"></div>
-                </div>
-                
-                <div class="visualization">
-                    <h2>Time Analysis</h2>
-                    <div id="time-chart"></div>
-                </div>
-                
-                <div class="visualization">
-                    <h2>Evidence Analysis</h2>
-                    <div id="evidence-chart"></div>
-                </div>
-                
-                <div class="visualization">
-                    <h2>Location Analysis</h2>
-                    <div id="location-chart"></div>
-                </div>
-                
-                <div class="visualization">
-                    <h2>Correlation Analysis</h2>
-                    <div id="correlation-chart"></div>
-                </div>
-                
-                <script>
-                    // This is a placeholder. Replace with actual D3 code.
-                    document.addEventListener('DOMContentLoaded', function() {
-                        d3.select('#map-container')
-                            .append('p')
-                            .text('Map visualization placeholder');
-                            
-                        d3.select('#time-chart')
-                            .append('p')
-                            .text('Time analysis placeholder');
-                            
-                        d3.select('#evidence-chart')
-                            .append('p')
-                            .text('Evidence analysis placeholder');
-                            
-                        d3.select('#location-chart')
-                            .append('p')
-                            .text('Location analysis placeholder');
-                            
-                        d3.select('#correlation-chart')
-                            .append('p')
-                            .text('Correlation analysis placeholder');
-                    });
-                </script>
-            </body>
-            </html>
-            """)
-        
-        return False
+    if (_VIZ_DIR / "index.html").is_file():
+        return True
     
-    return True
\ No newline at end of file
+    _write_default_d3_index()
+    st.warning("D3 visualization file not found. You should create it with the D3 code provided.")
+    return False